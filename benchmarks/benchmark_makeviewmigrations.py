@@ -0,0 +1,312 @@
+"""
+Benchmark of makeviewmigrations on a synthetic project (sqlite).
+
+Generates N apps with M views each (regular and materialized, part of them with per engine definitions,
+part of them selecting from other views) and K historical view migrations per app,
+then measures time and memory (tracemalloc peak) of each makeviewmigrations phase:
+    loader - MigrationLoader (reading migration files, building migration graph)
+    state - view-only project state of migrations and of current models
+    detection - ViewMigrationAutoDetector.changes (normalization included)
+    normalization - time spent in sql normalization (part of detection, memory is not tracked separately)
+    writing - rendering and writing new migration files (to a scratch directory)
+
+Usage:
+    python benchmarks/benchmark_makeviewmigrations.py --apps 10 --views 20 --migrations 5
+    python benchmarks/benchmark_makeviewmigrations.py --json results.json  # to compare results between versions
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PHASES = ("loader", "state", "detection", "normalization", "writing")
+ENGINES = ("django.db.backends.sqlite3", "django.db.backends.postgresql")
+
+MODELS_HEADER = """from django.db import models
+from django_db_views.db_view import DBView, DBMaterializedView
+"""
+
+VIEW_TEMPLATE = """
+
+class {class_name}({base_class}):
+    view_definition = {view_definition!r}
+    name = models.CharField(max_length=64)
+
+    class Meta:
+        managed = False
+        db_table = {table_name!r}
+"""
+
+
+def get_table_name(app_index: int, view_index: int) -> str:
+    return "bench_app_%s_view_%s" % (app_index, view_index)
+
+
+def get_view_definition(app_index: int, view_index: int, version: int):
+    table_name = get_table_name(app_index, view_index)
+    if view_index % 2 and view_index > 0:
+        # view on other view, exercises dependency graph.
+        sql = "SELECT id, name || '%s' AS name FROM %s WHERE id > %s" % (
+            table_name,
+            get_table_name(app_index, view_index - 1),
+            version,
+        )
+    else:
+        sql = "SELECT %s AS id, '%s' AS name" % (version, table_name)
+    if view_index % 3 == 0:
+        return {
+            engine: "%s /* %s */" % (sql, engine.rsplit(".", 1)[-1])
+            for engine in ENGINES
+        }
+    return sql
+
+
+def generate_project(path: Path, apps_count: int, views_count: int) -> list:
+    app_labels = []
+    for app_index in range(apps_count):
+        app_label = "bench_app_%s" % app_index
+        app_path = path / app_label
+        (app_path / "migrations").mkdir(parents=True)
+        (app_path / "__init__.py").write_text("")
+        (app_path / "migrations" / "__init__.py").write_text("")
+        models = [MODELS_HEADER]
+        for view_index in range(views_count):
+            models.append(
+                VIEW_TEMPLATE.format(
+                    class_name="View%s" % view_index,
+                    base_class="DBMaterializedView"
+                    if view_index % 4 == 3
+                    else "DBView",
+                    view_definition=get_view_definition(app_index, view_index, 0),
+                    table_name=get_table_name(app_index, view_index),
+                )
+            )
+        (app_path / "models.py").write_text("".join(models))
+        app_labels.append(app_label)
+    return app_labels
+
+
+def setup_django(path: Path, app_labels: list) -> None:
+    import django
+    from django.conf import settings
+
+    sys.path.insert(0, str(path))
+    settings.configure(
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": str(path / "db.sqlite3"),
+            }
+        },
+        INSTALLED_APPS=["django_db_views", *app_labels],
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+    )
+    django.setup()
+
+
+def set_views_version(app_labels: list, views_count: int, version: int) -> None:
+    from django.apps import apps
+
+    for app_index, app_label in enumerate(app_labels):
+        for view_index in range(views_count):
+            model = apps.get_model(app_label, "View%s" % view_index)
+            model.view_definition = get_view_definition(app_index, view_index, version)
+
+
+class PhaseTimer(object):
+    def __init__(self):
+        self.results = {}
+
+    def add(self, phase: str, duration: float, peak_memory=None) -> None:
+        self.results.setdefault(phase, []).append((duration, peak_memory))
+
+    @contextmanager
+    def phase(self, phase: str):
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            peak_memory = tracemalloc.get_traced_memory()[1] - memory_before
+            self.add(phase, duration, peak_memory)
+
+
+@contextmanager
+def track_normalization(timer: PhaseTimer):
+    from django_db_views import normalization
+
+    original_sql_normalize = normalization.sql_normalize
+    measurement = {"duration": 0.0, "calls": 0}
+
+    def timed_sql_normalize(sql):
+        start = time.perf_counter()
+        try:
+            return original_sql_normalize(sql)
+        finally:
+            measurement["duration"] += time.perf_counter() - start
+            measurement["calls"] += 1
+
+    normalization.sql_normalize = timed_sql_normalize
+    try:
+        yield measurement
+    finally:
+        normalization.sql_normalize = original_sql_normalize
+        timer.add("normalization", measurement["duration"])
+
+
+def run_makeviewmigrations(
+    timer: PhaseTimer, scratch_path: Path, app_labels=None
+) -> int:
+    """Same steps as makeviewmigrations command, measured one by one."""
+    from django.db.migrations.loader import MigrationLoader
+    from django.db.migrations.questioner import NonInteractiveMigrationQuestioner
+    from django.db.migrations.writer import MigrationWriter
+
+    from django_db_views.autodetector import ViewMigrationAutoDetector
+    from django_db_views.context_manager import view_migration_context
+    from django_db_views.normalization import get_sql_normalization_cache
+    from django_db_views.state import (
+        get_app_labels_scope,
+        get_view_migrations_state,
+        get_view_models_state,
+    )
+
+    # cold normalization cache, same as a new process.
+    get_sql_normalization_cache().entries.clear()
+    with view_migration_context():
+        with timer.phase("loader"):
+            loader = MigrationLoader(None, ignore_no_migrations=True)
+        with timer.phase("state"):
+            scope = None
+            if app_labels:
+                scope = get_app_labels_scope(app_labels, loader.graph)
+            from_state = get_view_migrations_state(loader, scope)
+            to_state = get_view_models_state(scope)
+        with timer.phase("detection"), track_normalization(timer):
+            autodetector = ViewMigrationAutoDetector(
+                from_state,
+                to_state,
+                questioner=NonInteractiveMigrationQuestioner(),
+                app_labels=scope,
+            )
+            changes = autodetector.changes(
+                graph=loader.graph,
+                trim_to_apps=app_labels or None,
+                convert_apps=app_labels or None,
+            )
+        with timer.phase("writing"):
+            migrations_count = 0
+            for app_label, app_migrations in changes.items():
+                for migration in app_migrations:
+                    writer = MigrationWriter(migration)
+                    migration_path = scratch_path / app_label / writer.filename
+                    migration_path.parent.mkdir(parents=True, exist_ok=True)
+                    migration_path.write_text(writer.as_string())
+                    migrations_count += 1
+    return migrations_count
+
+
+def format_memory(peak_memory) -> str:
+    if peak_memory is None:
+        return "-"
+    return "%.2f MB" % (peak_memory / 1024 / 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--apps", type=int, default=5, help="Number of apps.")
+    parser.add_argument("--views", type=int, default=20, help="Views per app.")
+    parser.add_argument(
+        "--migrations", type=int, default=3, help="Historical view migrations per app."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs.")
+    parser.add_argument(
+        "--targeted",
+        action="store_true",
+        help="Run makeviewmigrations for the first app only (makeviewmigrations bench_app_0).",
+    )
+    parser.add_argument("--json", help="Write results to the json file.")
+    options = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="db_views_benchmark_") as path:
+        path = Path(path)
+        app_labels = generate_project(path / "project", options.apps, options.views)
+        setup_django(path / "project", app_labels)
+
+        from django.core.management import call_command
+
+        start = time.perf_counter()
+        for version in range(options.migrations):
+            set_views_version(app_labels, options.views, version)
+            call_command("makeviewmigrations", name="version_%s" % version, verbosity=0)
+        print(
+            "Generated %s apps x %s views x %s migrations in %.2fs"
+            % (
+                options.apps,
+                options.views,
+                options.migrations,
+                time.perf_counter() - start,
+            )
+        )
+
+        # every measured run detects changes of all views.
+        set_views_version(app_labels, options.views, options.migrations)
+        timer = PhaseTimer()
+        tracemalloc.start()
+        try:
+            for run in range(options.repeat):
+                migrations_count = run_makeviewmigrations(
+                    timer,
+                    path / "scratch" / str(run),
+                    app_labels={app_labels[0]} if options.targeted else None,
+                )
+        finally:
+            tracemalloc.stop()
+
+    print("Detected changes in %s migration(s) per run" % migrations_count)
+    print("%-14s %12s %12s %14s" % ("phase", "median", "max", "peak memory"))
+    results = {}
+    for phase in PHASES:
+        measurements = timer.results[phase]
+        durations = [duration for duration, _ in measurements]
+        peak_memories = [memory for _, memory in measurements if memory is not None]
+        results[phase] = {
+            "durations": durations,
+            "peak_memory": max(peak_memories) if peak_memories else None,
+        }
+        print(
+            "%-14s %11.4fs %11.4fs %14s"
+            % (
+                phase,
+                statistics.median(durations),
+                max(durations),
+                format_memory(results[phase]["peak_memory"]),
+            )
+        )
+    if options.json:
+        with open(options.json, "w") as json_file:
+            json.dump(
+                {
+                    "apps": options.apps,
+                    "views": options.views,
+                    "migrations": options.migrations,
+                    "phases": results,
+                },
+                json_file,
+                indent=2,
+            )
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import django
+
+if django.VERSION < (3, 2):
+    # app config with ready() (auto refresh signals) is picked up automatically since django 3.2.
+    default_app_config = "django_db_views.apps.DjangoDBViewsConfig"
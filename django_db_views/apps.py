@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class DjangoDBViewsConfig(AppConfig):
+    name = "django_db_views"
+    verbose_name = "Django DB Views"
+    # keep migrations of the app independent of project DEFAULT_AUTO_FIELD.
+    default_auto_field = "django.db.models.AutoField"
+
+    def ready(self):
+        from django_db_views.auto_refresh import connect_source_models
+
+        connect_source_models()
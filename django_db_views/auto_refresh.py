@@ -0,0 +1,207 @@
+import threading
+import warnings
+from typing import Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save, post_delete
+from django.utils.module_loading import import_string
+
+from django_db_views.db_view import DBMaterializedView, DBViewsRegistry
+from django_db_views.dependency_graph import ViewDependencyGraph
+from django_db_views.labels import get_view_label
+
+CLAIM_KEY_PREFIX = "django_db_views:refresh_claim"
+
+# views with refresh_on_change, their source models are resolved on the first model change.
+_connected_views = set()
+# source model -> views refreshed when the model changes, None until resolved.
+_source_views = None
+_source_views_lock = threading.Lock()
+
+
+def get_refresh_window(view_model) -> float:
+    """
+    Settings:
+        DB_VIEWS_AUTO_REFRESH_WINDOW - seconds, changes within the window are merged into one refresh (default 60),
+            view can override it with refresh_window attribute.
+    """
+    window = getattr(view_model, "refresh_window", None)
+    if window is None:
+        window = getattr(settings, "DB_VIEWS_AUTO_REFRESH_WINDOW", 60)
+    return window
+
+
+def get_claims_cache():
+    """
+    Settings:
+        DB_VIEWS_AUTO_REFRESH_CACHE - cache alias where processes claim scheduled refreshes ("default" by default),
+            should be shared between processes, so each view is refreshed once per window by one of them.
+    """
+    return caches[getattr(settings, "DB_VIEWS_AUTO_REFRESH_CACHE", DEFAULT_CACHE_ALIAS)]
+
+
+def get_claim_key(view_model, using: str) -> str:
+    return "%s:%s:%s" % (CLAIM_KEY_PREFIX, using, view_model._meta.db_table)
+
+
+def get_source_models(view_model, graph: Optional[ViewDependencyGraph] = None) -> set:
+    """
+    Models whose changes mark the view dirty, refresh_on_change of the view:
+        True - regular models the view data comes from (see ViewDependencyGraph.get_source_models).
+        list of models or "app_label.Model" labels.
+    """
+    refresh_on_change = getattr(view_model, "refresh_on_change", False)
+    if not refresh_on_change:
+        return set()
+    if refresh_on_change is True:
+        graph = graph or ViewDependencyGraph()
+        return graph.get_source_models(view_model)
+    return {
+        apps.get_model(model) if isinstance(model, str) else model
+        for model in refresh_on_change
+    }
+
+
+def connect_source_models(view_models=None) -> None:
+    """
+    Connects post_save and post_delete to refresh views with refresh_on_change
+    (all registered materialized views by default), called when the app is ready.
+    Source models are resolved on the first model change, so view definitions are not evaluated at startup.
+    Queryset update(), bulk_create() and raw sql do not send signals, use mark_dirty after them.
+    """
+    global _source_views
+    if view_models is None:
+        view_models = DBViewsRegistry.get_by_base_class(DBMaterializedView)
+    view_models = [
+        view_model
+        for view_model in view_models
+        if getattr(view_model, "refresh_on_change", False)
+    ]
+    if not view_models:
+        return
+    with _source_views_lock:
+        _connected_views.update(view_models)
+        _source_views = None
+    for signal in (post_save, post_delete):
+        signal.connect(
+            handle_source_change,
+            weak=False,
+            dispatch_uid="django_db_views_auto_refresh",
+        )
+
+
+def get_source_views() -> dict:
+    """Maps source models to connected views, built once (on the first model change)."""
+    global _source_views
+    with _source_views_lock:
+        if _source_views is None:
+            graph = None
+            if any(
+                view_model.refresh_on_change is True for view_model in _connected_views
+            ):
+                graph = ViewDependencyGraph()
+            source_views = {}
+            for view_model in _connected_views:
+                for model in get_source_models(view_model, graph):
+                    source_views.setdefault(model, set()).add(view_model)
+            _source_views = source_views
+        return _source_views
+
+
+def handle_source_change(sender, using=None, **kwargs) -> None:
+    for view_model in get_source_views().get(sender, ()):
+        mark_dirty(view_model, using)
+
+
+def mark_dirty(view_model, using: Optional[str] = None) -> None:
+    """
+    Schedules refresh of the view when the current transaction commits (refresh has to see the changes).
+    Marks within the refresh window are merged into one refresh.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    transaction.on_commit(
+        lambda: get_refresher().schedule(view_model, using), using=using
+    )
+
+
+class DebouncedRefresher(object):
+    """
+    Schedules one refresh per view and database in each refresh window.
+    The first mark of the window claims the refresh in the cache shared by processes,
+    marks of other processes are merged into it. Claim is removed just before the refresh,
+    so changes committed later are refreshed in the next window.
+    Refreshes run in timer threads on their own connections, or are handed over to
+    DB_VIEWS_AUTO_REFRESH_SCHEDULER - callable or its dotted path, called with (view label, using, delay),
+    e.g. to run a task queue job after the delay, the job has to call run_scheduled_refresh(view label, using).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}
+
+    def schedule(self, view_model, using: str) -> bool:
+        """Returns False when refresh of the window is already scheduled."""
+        key = (view_model, using)
+        with self.lock:
+            if key in self.timers:
+                return False
+            window = get_refresh_window(view_model)
+            # claim outlives the window, in case the refresh is late.
+            if not get_claims_cache().add(
+                get_claim_key(view_model, using), 1, timeout=window * 2
+            ):
+                return False
+            scheduler = getattr(settings, "DB_VIEWS_AUTO_REFRESH_SCHEDULER", None)
+            if scheduler is not None:
+                if isinstance(scheduler, str):
+                    scheduler = import_string(scheduler)
+                scheduler(get_view_label(view_model), using, window)
+                return True
+            timer = threading.Timer(window, self.run, (view_model, using))
+            timer.daemon = True
+            self.timers[key] = timer
+            timer.start()
+        return True
+
+    def run(self, view_model, using: str) -> None:
+        with self.lock:
+            self.timers.pop((view_model, using), None)
+        try:
+            run_scheduled_refresh(view_model, using)
+        except Exception as e:  # timer thread, nobody else will see it.
+            warnings.warn(
+                "Scheduled refresh of %s failed: %r" % (view_model._meta.db_table, e)
+            )
+        finally:
+            # connection of the timer thread.
+            connections[using].close()
+
+    def flush(self) -> None:
+        """Runs scheduled refreshes now (in the calling thread), e.g. on shutdown."""
+        with self.lock:
+            scheduled = list(self.timers.items())
+            self.timers.clear()
+        for (view_model, using), timer in scheduled:
+            timer.cancel()
+            run_scheduled_refresh(view_model, using)
+
+
+def run_scheduled_refresh(view_model, using: str) -> bool:
+    """
+    Refreshes the view (model or "app_label.Model" label) scheduled by DebouncedRefresher,
+    on the connection of the calling thread. Returns False when refresh was skipped (refresh lock).
+    """
+    if isinstance(view_model, str):
+        view_model = apps.get_model(view_model)
+    get_claims_cache().delete(get_claim_key(view_model, using))
+    return view_model.refresh(using=using)
+
+
+_refresher = DebouncedRefresher()
+
+
+def get_refresher() -> DebouncedRefresher:
+    return _refresher
@@ -1,11 +1,10 @@
-from typing import Type
+from typing import Type, Optional
 
 import django
 import six
-import sqlparse
 from django.apps import apps
 from django.conf import settings
-from django.db import connection, ProgrammingError
+from django.db import connection
 from django.db.migrations import SeparateDatabaseAndState
 from django.db.migrations.autodetector import MigrationAutodetector
 from django.db.migrations.graph import MigrationGraph
@@ -14,10 +13,14 @@ if django.VERSION >= (5, 1):
     from django.db.migrations.autodetector import OperationDependency
 
 from django_db_views.db_view import DBView, DBMaterializedView, DBViewsRegistry
+from django_db_views.dependency_graph import ViewDependencyGraph
+from django_db_views.normalization import get_sql_normalization_cache
 from django_db_views.operations import (
     ViewRunPython,
     DBViewModelState,
     ViewDropRunPython,
+    ViewIndexRunPython,
+    get_table_engine_name_hash,
 )
 from django_db_views.migration_functions import (
     ForwardViewMigration,
@@ -29,6 +32,12 @@ from django_db_views.migration_functions import (
     DropView,
     DropMaterializedView,
     DropViewMigration,
+    ViewIndexesMigration,
+)
+from django_db_views.indexes import get_view_indexes_from_model
+from django_db_views.view_definitions import (
+    get_view_definition_from_model,
+    get_cleaned_view_definition_value,
 )
 
 
@@ -41,13 +50,13 @@ class ViewMigrationAutoDetector(MigrationAutodetector):
     It's detect only view model changes.
     """
 
+    def __init__(self, from_state, to_state, questioner=None, app_labels=None):
+        super().__init__(from_state, to_state, questioner)
+        # when provided, only views of the apps are detected (see state.get_app_labels_scope).
+        self.app_labels = app_labels
+
     def _detect_changes(self, convert_apps=None, graph=None) -> dict:
-        # <START copy paste from MigrationAutodetector, depends on django version>
-        if django.VERSION >= (4,):
-            self._detect_changes_preparation_django_version_4_and_above(convert_apps)
-        else:
-            self._detect_changes_preparation_django_below_version_4(convert_apps)
-        # <END of copy paste from MigrationAutodetector>
+        self._detect_changes_preparation(convert_apps)
 
         self.generate_views_operations(graph)
         self.delete_old_views()
@@ -68,44 +77,12 @@ class ViewMigrationAutoDetector(MigrationAutodetector):
         return self.migrations
         # <END end of copy paste from MigrationAutodetector>
 
-    def _detect_changes_preparation_django_below_version_4(self, convert_apps):
-        self.generated_operations = {}
-        self.altered_indexes = {}
-
-        # Prepare some old/new state and model lists, separating
-        # proxy models and ignoring unmigrated apps.
-        self.old_apps = self.from_state.concrete_apps
-        self.new_apps = self.to_state.apps
-        self.old_model_keys = []
-        self.old_proxy_keys = []
-        self.old_unmanaged_keys = []
-        self.new_model_keys = []
-        self.new_proxy_keys = []
-        self.new_unmanaged_keys = []
-
-        for al, mn in sorted(self.from_state.models.keys()):
-            model = self.old_apps.get_model(al, mn)
-            if not model._meta.managed:
-                self.old_unmanaged_keys.append((al, mn))
-            elif al not in self.from_state.real_apps:
-                if model._meta.proxy:
-                    self.old_proxy_keys.append((al, mn))
-                else:
-                    self.old_model_keys.append((al, mn))
-
-        for al, mn in sorted(self.to_state.models.keys()):
-            model = self.new_apps.get_model(al, mn)
-            if not model._meta.managed:
-                self.new_unmanaged_keys.append((al, mn))
-            elif al not in self.from_state.real_apps or (
-                convert_apps and al in convert_apps
-            ):
-                if model._meta.proxy:
-                    self.new_proxy_keys.append((al, mn))
-                else:
-                    self.new_model_keys.append((al, mn))
-
-    def _detect_changes_preparation_django_version_4_and_above(self, convert_apps):
+    def _detect_changes_preparation(self, convert_apps):
+        """
+        Based on MigrationAutodetector preparation, but states are not rendered (django < 4)
+        nor resolved (django 4+). View states contain only views (see state module),
+        relations of their fields can't be resolved and detection doesn't need them.
+        """
         self.generated_operations = {}
         self.altered_indexes = {}
         self.altered_constraints = {}
@@ -138,9 +115,6 @@ class ViewMigrationAutoDetector(MigrationAutodetector):
                 else:
                     self.new_model_keys.add((app_label, model_name))
 
-        self.from_state.resolve_fields_and_relations()
-        self.to_state.resolve_fields_and_relations()
-
     def delete_old_views(self):
         for (
             app_label,
@@ -171,36 +145,46 @@ class ViewMigrationAutoDetector(MigrationAutodetector):
         return view_models
 
     @staticmethod
-    def get_current_view_models():
+    def get_current_view_models(app_labels=None):
         view_models = {}
-        for app_label, models in apps.all_models.items():
-            for model_name, model_class in models.items():
-                if model_class._meta.db_table in DBViewsRegistry:
+        for app_label in apps.all_models if app_labels is None else app_labels:
+            models = apps.all_models.get(app_label, {})
+            for model_class in DBViewsRegistry.get_by_app_label(app_label):
+                model_name = model_class._meta.model_name
+                # registry keeps views of models which were unregistered from apps.
+                if models.get(model_name) is model_class:
                     key = (app_label, model_name)
                     view_models[key] = model_class
         return view_models
 
     @staticmethod
     def is_same_views(current: str, new: str) -> bool:
-        def sql_normalize(s: str) -> str:
-            return sqlparse.format(
-                s,
-                compact=True,
-                keyword_case="upper",
-                identifier_case="lower",
-                reindent=True,
-                strip_comments=True,
-            ).strip()
-
-        return sql_normalize(current) == sql_normalize(new)
+        if current == new:
+            return True
+        cache = get_sql_normalization_cache()
+        return cache.normalize(current) == cache.normalize(new)
 
     def generate_views_operations(self, graph: MigrationGraph) -> None:
-        view_models = self.get_current_view_models()
-        for (app_label, model_name), view_model in view_models.items():
+        self.recreated_views = set()
+        view_models = self.get_current_view_models(self.app_labels)
+        previous_view_definitions = self.get_previous_view_definitions_index(
+            graph, {app_label for app_label, _ in view_models}
+        )
+        # views are created after views they depend on.
+        dependency_graph = ViewDependencyGraph(view_models=view_models.values())
+        view_models_keys = {view_model: key for key, view_model in view_models.items()}
+        try:
+            ordered_view_models = dependency_graph.get_ordered_views(
+                view_models.values()
+            )
+        except ValueError:  # inferred dependencies are circular, keep models order.
+            ordered_view_models = view_models.values()
+        for view_model in ordered_view_models:
+            app_label, model_name = view_models_keys[view_model]
             new_view_definition = self.get_view_definition_from_model(view_model)
             for engine, latest_view_definition in new_view_definition.items():
-                current_view_definition = self.get_previous_view_definition_state(
-                    graph, app_label, view_model._meta.db_table, engine
+                current_view_definition = previous_view_definitions.get(
+                    (app_label, view_model._meta.db_table, engine), ""
                 )
                 if not self.is_same_views(
                     current_view_definition, latest_view_definition
@@ -221,25 +205,75 @@ class ViewMigrationAutoDetector(MigrationAutodetector):
                             else:
                                 dependency = (base_app_label, base_name, None, True)
                             dependencies.append(dependency)
-                    dependencies += getattr(view_model, "dependencies", [])
+                    dependencies += [
+                        self._get_operation_dependency(dependency)
+                        for dependency in getattr(view_model, "dependencies", [])
+                    ]
+                    # depend on models from other apps used by view definition.
+                    for model in dependency_graph.get_dependencies(view_model):
+                        if model._meta.app_label != app_label:
+                            dependencies.append(
+                                self._get_operation_dependency(
+                                    (
+                                        model._meta.app_label,
+                                        model._meta.model_name,
+                                        None,
+                                        True,
+                                    )
+                                )
+                            )
+                    # indexes are recreated with the view.
+                    forward_kwargs = {"engine": engine}
+                    backward_kwargs = {"engine": engine}
+                    latest_indexes = self.get_view_indexes_from_model(
+                        view_model, engine
+                    )
+                    previous_indexes = self.get_previous_view_indexes(
+                        app_label, view_model._meta.db_table, engine
+                    )
+                    if latest_indexes:
+                        forward_kwargs["indexes"] = latest_indexes
+                    if not getattr(view_model, "with_data", True):
+                        forward_kwargs["with_data"] = False
+                    if previous_indexes and current_view_definition:
+                        backward_kwargs["indexes"] = previous_indexes
+                    self.recreated_views.add(
+                        (app_label, view_model._meta.db_table, engine)
+                    )
                     self.add_operation(
                         app_label,
                         ViewRunPython(
                             self.get_forward_migration_class(view_model)(
                                 latest_view_definition.strip(";"),
                                 view_model._meta.db_table,
-                                engine=engine,
+                                **forward_kwargs,
                             ),
                             self.get_backward_migration_class(view_model)(
                                 current_view_definition.strip(";"),
                                 view_model._meta.db_table,
-                                engine=engine,
+                                **backward_kwargs,
                             ),
                             atomic=False,
                         ),
                         dependencies=dependencies,
                     )
 
+    @staticmethod
+    def _get_operation_dependency(dependency):
+        """Since django 5.1 dependencies declared as tuples have to be converted."""
+        if django.VERSION >= (5, 1) and not isinstance(dependency, OperationDependency):
+            app_label, model_name, field_name, dependency_type = dependency
+            if dependency_type is True:
+                dependency_type = OperationDependency.Type.CREATE
+            elif dependency_type is False:
+                dependency_type = OperationDependency.Type.REMOVE
+            elif dependency_type == "alter":
+                dependency_type = OperationDependency.Type.ALTER
+            return OperationDependency(
+                app_label, model_name, field_name, dependency_type
+            )
+        return dependency
+
     @staticmethod
     def get_forward_migration_class(model) -> Type[ForwardViewMigrationBase]:
         if issubclass(model, DBMaterializedView):
@@ -267,81 +301,76 @@ class ViewMigrationAutoDetector(MigrationAutodetector):
             raise NotImplementedError
 
     @classmethod
-    def get_view_definition_from_model(cls, view_model: DBView) -> dict:
-        view_definitions = {}
-        if callable(view_model.view_definition):
-            raw_view_definition = view_model.view_definition()
-        else:
-            raw_view_definition = view_model.view_definition
-
-        if isinstance(raw_view_definition, dict):
-            for engine, definition in raw_view_definition.items():
-                view_definitions[engine] = cls.get_cleaned_view_definition_value(
-                    definition
-                )
-        else:
-            engine = settings.DATABASES["default"]["ENGINE"]
-            view_definitions[engine] = cls.get_cleaned_view_definition_value(
-                raw_view_definition
-            )
-        return view_definitions
+    def get_view_definition_from_model(
+        cls, view_model: DBView, engine: Optional[str] = None
+    ) -> dict:
+        return get_view_definition_from_model(view_model, engine=engine)
 
     def get_previous_view_definition_state(
         self, graph: MigrationGraph, app_label: str, for_table_name: str, engine: str
     ) -> str:
-        nodes = graph.leaf_nodes(app_label)
-        last_node = nodes[0] if nodes else None
-
-        while last_node:
-            migration = graph.nodes[last_node]
-            if migration.operations:
-                for operation in migration.operations:
-                    if isinstance(operation, ViewRunPython):
-                        (
-                            table_name,
-                            previous_view_engine,
-                        ) = self._get_view_identifiers_from_operation(operation)
-                        if (
-                            table_name == for_table_name
-                            and previous_view_engine == engine
-                        ):
-                            return operation.code.view_definition.strip()
-                    elif isinstance(operation, SeparateDatabaseAndState):
-                        view_operations = list(
-                            filter(
-                                lambda op: isinstance(op, ViewRunPython),
-                                operation.database_operations,
-                            )
+        return self.get_previous_view_definitions_index(graph, [app_label]).get(
+            (app_label, for_table_name, engine), ""
+        )
+
+    def get_previous_view_definitions_index(
+        self, graph: MigrationGraph, app_labels
+    ) -> dict:
+        """
+        Maps (app_label, table_name, engine) to the latest view definition.
+        Each app migrations chain is walked once, from the leaf node back to the initial migration,
+        so the first definition found for a key is the latest one.
+        """
+        index = {}
+        leaf_nodes = {}
+        # leaf_nodes scans the whole graph, so we call it once for all apps.
+        for node in graph.leaf_nodes():
+            if node[0] in app_labels:
+                leaf_nodes.setdefault(node[0], node)
+
+        for app_label, last_node in leaf_nodes.items():
+            while last_node:
+                migration = graph.nodes[last_node]
+                for operation in self._get_view_operations(migration.operations or []):
+                    (
+                        table_name,
+                        previous_view_engine,
+                    ) = self._get_view_identifiers_from_operation(operation)
+                    index.setdefault(
+                        (app_label, table_name, previous_view_engine),
+                        operation.code.view_definition.strip(),
+                    )
+                # right now i get only migrations from the same app.
+                app_parents = list(
+                    sorted(
+                        filter(
+                            lambda x: x[0] == app_label,
+                            graph.node_map[last_node].parents,
                         )
-                        if view_operations:
-                            assert (
-                                len(view_operations) <= 1
-                            ), "SeparateDatabaseAndState can't contain more than one ViewRunPython operation"
-                            view_operation = view_operations[0]
-                            (
-                                table_name,
-                                previous_view_engine,
-                            ) = self._get_view_identifiers_from_operation(
-                                view_operation
-                            )
-                            if (
-                                table_name == for_table_name
-                                and previous_view_engine == engine
-                            ):
-                                return view_operation.code.view_definition.strip()
-            # right now i get only migrations from the same app.
-            app_parents = list(
-                sorted(
+                    )
+                )
+                if app_parents:
+                    last_node = app_parents[-1]
+                else:  # if no parents mean we found initial migration
+                    last_node = None
+        return index
+
+    @staticmethod
+    def _get_view_operations(operations):
+        for operation in operations:
+            if isinstance(operation, ViewRunPython):
+                yield operation
+            elif isinstance(operation, SeparateDatabaseAndState):
+                view_operations = list(
                     filter(
-                        lambda x: x[0] == app_label, graph.node_map[last_node].parents
+                        lambda op: isinstance(op, ViewRunPython),
+                        operation.database_operations,
                     )
                 )
-            )
-            if app_parents:
-                last_node = app_parents[-1]
-            else:  # if no parents mean we found initial migration
-                last_node = None
-        return ""
+                assert (
+                    len(view_operations) <= 1
+                ), "SeparateDatabaseAndState can't contain more than one ViewRunPython operation"
+                yield from view_operations
 
     def _get_view_identifiers_from_operation(self, operation) -> tuple[str, str]:
         table_name = operation.code.table_name
@@ -353,27 +382,96 @@ class ViewMigrationAutoDetector(MigrationAutodetector):
 
     @staticmethod
     def get_cleaned_view_definition_value(view_definition: str) -> str:
-        assert isinstance(
-            view_definition, str
-        ), "View definition must be callable and return string or be itself a string."
-        return view_definition.strip()
+        return get_cleaned_view_definition_value(view_definition)
 
     def get_current_view_definition_from_database(self, table_name: str) -> str:
-        """working only with postgres"""
+        """working only with postgres, see drift.get_deployed_views for all views of any database."""
         with connection.cursor() as cursor:
-            try:
-                cursor.execute("SELECT pg_get_viewdef('%s')" % table_name)
-                current_view_definition = cursor.fetchone()[0].strip()
-            except ProgrammingError:  # VIEW NOT EXIST
-                current_view_definition = ""
-            finally:
-                return current_view_definition
+            # to_regclass returns null when view does not exist.
+            cursor.execute("SELECT pg_get_viewdef(to_regclass(%s))", [table_name])
+            current_view_definition = cursor.fetchone()[0]
+        return (current_view_definition or "").strip()
+
+    @staticmethod
+    def get_view_indexes_from_model(view_model, engine: str) -> dict:
+        if not issubclass(view_model, DBMaterializedView):
+            return {}
+        return get_view_indexes_from_model(view_model, engine)
+
+    def get_previous_view_indexes(
+        self, app_label: str, table_name: str, engine: str
+    ) -> dict:
+        model_state = self.from_state.models.get(
+            (app_label, get_table_engine_name_hash(table_name, engine))
+        )
+        if isinstance(model_state, DBViewModelState):
+            return getattr(model_state, "view_indexes", None) or {}
+        return {}
 
     def detect_index_changes(self):
-        pass
+        """Detects index changes of materialized views, that are not recreated by this migration."""
+        for (
+            app_label,
+            model_name,
+        ), view_model in self.get_current_view_models(self.app_labels).items():
+            if not issubclass(view_model, DBMaterializedView):
+                continue
+            table_name = view_model._meta.db_table
+            for engine in self.get_view_definition_from_model(view_model):
+                if (app_label, table_name, engine) in self.recreated_views:
+                    continue
+                for index_name, index_sql in self.get_previous_view_indexes(
+                    app_label, table_name, engine
+                ).items():
+                    self.old_indexes.add(
+                        (app_label, table_name, engine, index_name, index_sql)
+                    )
+                for index_name, index_sql in self.get_view_indexes_from_model(
+                    view_model, engine
+                ).items():
+                    self.new_indexes.add(
+                        (app_label, table_name, engine, index_name, index_sql)
+                    )
+
+    @staticmethod
+    def _group_indexes(indexes: set) -> dict:
+        grouped_indexes = {}
+        for app_label, table_name, engine, index_name, index_sql in sorted(indexes):
+            grouped_indexes.setdefault((app_label, table_name, engine), {})[
+                index_name
+            ] = index_sql
+        return grouped_indexes
 
     def drop_indexes(self):
-        pass
+        for (app_label, table_name, engine), indexes in self._group_indexes(
+            self.old_indexes - self.new_indexes
+        ).items():
+            self.add_operation(
+                app_label,
+                ViewIndexRunPython(
+                    ViewIndexesMigration(
+                        table_name, remove_indexes=list(indexes), engine=engine
+                    ),
+                    ViewIndexesMigration(
+                        table_name, add_indexes=indexes, engine=engine
+                    ),
+                    atomic=False,
+                ),
+            )
 
     def generate_indexes(self):
-        pass
+        for (app_label, table_name, engine), indexes in self._group_indexes(
+            self.new_indexes - self.old_indexes
+        ).items():
+            self.add_operation(
+                app_label,
+                ViewIndexRunPython(
+                    ViewIndexesMigration(
+                        table_name, add_indexes=indexes, engine=engine
+                    ),
+                    ViewIndexesMigration(
+                        table_name, remove_indexes=list(indexes), engine=engine
+                    ),
+                    atomic=False,
+                ),
+            )
@@ -1,9 +1,139 @@
-from typing import Union, Callable
+import time
+from datetime import datetime, timedelta
+from typing import Union, Callable, Optional
 
-from django.db import models, connections, DEFAULT_DB_ALIAS
+from django.db import models, connections, DEFAULT_DB_ALIAS, NotSupportedError
 from django.db.models.base import ModelBase
+from django.utils import timezone
 
-DBViewsRegistry = {}
+from django_db_views.refresh_strategies import (
+    REFRESH,
+    CONCURRENTLY,
+    SWAP,
+    refresh_materialized_view,
+    swap_materialized_view,
+    is_materialized_view_emulated,
+    rebuild_materialized_table,
+    get_unpopulated_materialized_views,
+    statement_timeout as statement_timeout_context,
+    lock_timeout as lock_timeout_context,
+    refresh_lock,
+)
+from django_db_views.fingerprints import (
+    get_fingerprint,
+    is_fingerprint_tracking_enabled,
+)
+from django_db_views.metrics import report_metric, REFRESH_METRIC
+from django_db_views.query_cache import bump_view_version
+from django_db_views.refresh_log import record_refresh, get_last_refreshed
+from django_db_views.signals import pre_refresh, post_refresh
+from django_db_views.view_definitions import (
+    get_view_definition_engines,
+    get_view_definition_from_model,
+)
+
+
+class ViewsRegistry(dict):
+    """
+    View models by db_table, indexed by app label, base class, engine and database alias.
+    Indexes are maintained on each change, the engine index is built on first engine lookup
+    (it evaluates callable view definitions) and rebuilt when view_definition of a view changes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._by_app_label = {}
+        self._by_base_class = {}
+        self._by_engine = None
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, table_name, view_model):
+        if table_name in self:
+            self._remove_from_indexes(self[table_name])
+        super().__setitem__(table_name, view_model)
+        self._add_to_indexes(view_model)
+
+    def __delitem__(self, table_name):
+        self._remove_from_indexes(self[table_name])
+        super().__delitem__(table_name)
+
+    def pop(self, table_name, *default):
+        if table_name in self:
+            self._remove_from_indexes(self[table_name])
+        return super().pop(table_name, *default)
+
+    def popitem(self):
+        table_name, view_model = super().popitem()
+        self._remove_from_indexes(view_model)
+        return table_name, view_model
+
+    def setdefault(self, table_name, view_model=None):
+        if table_name not in self:
+            self[table_name] = view_model
+        return self[table_name]
+
+    def update(self, *args, **kwargs):
+        for table_name, view_model in dict(*args, **kwargs).items():
+            self[table_name] = view_model
+
+    def clear(self):
+        super().clear()
+        self._by_app_label.clear()
+        self._by_base_class.clear()
+        self._by_engine = None
+
+    def _add_to_indexes(self, view_model) -> None:
+        # dicts are used as ordered sets, views keep registration order.
+        self._by_app_label.setdefault(view_model._meta.app_label, {})[view_model] = None
+        for base_class in view_model.__mro__:
+            if isinstance(base_class, DBViewModelBase):
+                self._by_base_class.setdefault(base_class, {})[view_model] = None
+        self._by_engine = None
+
+    def _remove_from_indexes(self, view_model) -> None:
+        self._by_app_label.get(view_model._meta.app_label, {}).pop(view_model, None)
+        for view_models in self._by_base_class.values():
+            view_models.pop(view_model, None)
+        self._by_engine = None
+
+    def clear_engines_index(self) -> None:
+        self._by_engine = None
+
+    def get_by_app_label(self, app_label: str) -> list:
+        return list(self._by_app_label.get(app_label, ()))
+
+    def get_by_base_class(self, base_class) -> list:
+        """Views which inherit from the class, e.g. DBMaterializedView."""
+        return list(self._by_base_class.get(base_class, ()))
+
+    def get_by_engine(self, engine: str) -> list:
+        """Views defined for the engine."""
+        if self._by_engine is None:
+            by_engine = {}
+            for view_model in self.values():
+                for view_engine in get_view_definition_engines(view_model):
+                    by_engine.setdefault(view_engine, {})[view_model] = None
+            self._by_engine = by_engine
+        return list(self._by_engine.get(engine, ()))
+
+    def get_by_database(self, using: Optional[str] = None) -> list:
+        """Views defined for the engine of the database."""
+        using = using or DEFAULT_DB_ALIAS
+        return self.get_by_engine(connections[using].settings_dict["ENGINE"])
+
+
+DBViewsRegistry = ViewsRegistry()
+
+
+class SQLCollector(object):
+    """Database execute wrapper, collects executed sql."""
+
+    def __init__(self, executed_sql: list):
+        self.executed_sql = executed_sql
+
+    def __call__(self, execute, sql, params, many, context):
+        self.executed_sql.append(sql)
+        return execute(sql, params, many, context)
 
 
 class DBViewModelBase(ModelBase):
@@ -16,6 +146,12 @@ class DBViewModelBase(ModelBase):
             DBViewsRegistry[new_class._meta.db_table] = new_class
         return new_class
 
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if name == "view_definition":
+            # engines of the view could change.
+            DBViewsRegistry.clear_engines_index()
+
 
 class DBView(models.Model, metaclass=DBViewModelBase):
     """
@@ -33,20 +169,228 @@ class DBView(models.Model, metaclass=DBViewModelBase):
 
 
 class DBMaterializedView(DBView):
+    """
+    Children can define:
+        refresh_strategy - default strategy used by refresh (see refresh_strategies).
+        refresh_lock - default lock mode used by refresh (wait or skip).
+        refresh_on_change - refresh the view when its source models change (see auto_refresh),
+            True for models inferred from view definition or a list of models.
+        refresh_window - seconds, changes within the window are merged into one refresh.
+        with_data - False creates the view WITH NO DATA (postgres), so migrate does not wait for the view data,
+            the view has to be populated later (refreshviews --unpopulated), until then queries fail.
+    Each refresh is recorded at MaterializedViewRefresh table (see refresh_log)
+    and invalidates cached results of the view (see query_cache).
+    """
+
+    refresh_strategy: str = REFRESH
+    refresh_lock: Optional[str] = None
+    refresh_on_change: Union[bool, list] = False
+    refresh_window: Optional[float] = None
+    with_data: bool = True
+
     class Meta:
         managed = False
         abstract = True
 
     @classmethod
-    def refresh(cls, using=None, concurrently=False):
+    def refresh(
+        cls,
+        using=None,
+        concurrently=False,
+        strategy=None,
+        statement_timeout=None,
+        lock=None,
+        lock_timeout=None,
+    ) -> bool:
         """
-        concurrently option requires an index and postgres db
+        strategy:
+            refresh - REFRESH MATERIALIZED VIEW, readers are blocked for the whole refresh.
+            concurrently - REFRESH MATERIALIZED VIEW CONCURRENTLY, requires an unique index and postgres db.
+                Used also when concurrently=True is passed.
+            swap - builds a shadow materialized view and swaps it in, readers are blocked only for the swap.
+                Requires postgres db.
+            Sqlite and mysql have no materialized views, view is a table built with CREATE TABLE AS,
+            refresh and swap rebuild the table from the model definition and swap it in (see rebuild_materialized_table).
+        statement_timeout - seconds, refresh statements are cancelled after it (postgres only).
+        lock - only one refresh of the view runs at once across all processes (postgres advisory lock):
+            wait - waits for the running refresh to finish, then refreshes.
+            skip - does not refresh when other refresh is running.
+            By default refresh_lock of the view is used, False disables it.
+        lock_timeout - seconds, waiting for the refresh lock and for locks of the view fails after it (postgres only).
+        Returns False when refresh was skipped (lock=skip).
+        View created WITH NO DATA can't be refreshed concurrently, it is refreshed regularly until populated.
         """
         using = using or DEFAULT_DB_ALIAS
-        with connections[using].cursor() as cursor:
-            if concurrently:
-                cursor.execute(
-                    "REFRESH MATERIALIZED VIEW CONCURRENTLY %s;" % cls._meta.db_table
+        if strategy is None:
+            strategy = CONCURRENTLY if concurrently else cls.refresh_strategy
+        if strategy not in (REFRESH, CONCURRENTLY, SWAP):
+            raise ValueError("Unknown refresh strategy: %s" % strategy)
+        if lock is None:
+            lock = cls.refresh_lock
+        connection = connections[using]
+        with lock_timeout_context(connection, lock_timeout):
+            with refresh_lock(connection, cls._meta.db_table, lock or None) as locked:
+                if not locked:
+                    return False
+                if strategy == CONCURRENTLY and not cls.is_populated(using):
+                    strategy = REFRESH
+                cls._refresh(connection, strategy, statement_timeout)
+        return True
+
+    @classmethod
+    def is_populated(cls, using=None) -> bool:
+        """False when the view was created WITH NO DATA and was not refreshed yet, queries of it fail until then."""
+        connection = connections[using or DEFAULT_DB_ALIAS]
+        return not get_unpopulated_materialized_views(connection, [cls._meta.db_table])
+
+    @classmethod
+    def _refresh(cls, connection, strategy: str, statement_timeout=None):
+        using = connection.alias
+        engine = connection.settings_dict["ENGINE"]
+        pre_refresh.send(sender=cls, using=using, engine=engine, strategy=strategy)
+        executed_sql = []
+        exception = None
+        started_at = timezone.now()
+        start = time.monotonic()
+        try:
+            with statement_timeout_context(connection, statement_timeout):
+                with connection.execute_wrapper(SQLCollector(executed_sql)):
+                    if is_materialized_view_emulated(connection):
+                        cls._rebuild_table(connection, strategy)
+                    elif strategy == SWAP:
+                        swap_materialized_view(connection, cls._meta.db_table)
+                    else:
+                        refresh_materialized_view(
+                            connection,
+                            cls._meta.db_table,
+                            concurrently=strategy == CONCURRENTLY,
+                        )
+        except Exception as e:
+            exception = e
+            raise
+        finally:
+            duration = time.monotonic() - start
+            post_refresh.send(
+                sender=cls,
+                using=using,
+                engine=engine,
+                strategy=strategy,
+                sql="\n".join(executed_sql),
+                duration=duration,
+                exception=exception,
+            )
+            report_metric(
+                REFRESH_METRIC,
+                duration,
+                view=cls._meta.db_table,
+                using=using,
+                engine=engine,
+                strategy=strategy,
+                success=exception is None,
+            )
+        record_refresh(
+            cls._meta.db_table,
+            using,
+            strategy,
+            started_at=started_at,
+            finished_at=timezone.now(),
+            duration=duration,
+        )
+        # cached results (CachedViewQuerySet) of the view are outdated.
+        bump_view_version(cls, using)
+
+    @classmethod
+    def _rebuild_table(cls, connection, strategy: str):
+        """
+        Materialized view is a table (sqlite, mysql), both refresh and swap rebuild it from the model definition.
+        Model definition has to be the deployed one (fingerprint of view migrations), changes are deployed by migrate.
+        """
+        from django_db_views.drift import get_forward_migration
+
+        if strategy == CONCURRENTLY:
+            raise NotSupportedError(
+                "Concurrent refresh is not supported by %s." % connection.vendor
+            )
+        engine = connection.settings_dict["ENGINE"]
+        if not get_view_definition_from_model(cls, engine).get(engine):
+            raise ValueError(
+                "%s has no view definition for %s." % (cls._meta.db_table, engine)
+            )
+        forward_migration = get_forward_migration(cls, engine)
+        if is_fingerprint_tracking_enabled():
+            fingerprint = get_fingerprint(connection, cls._meta.db_table)
+            if fingerprint not in (None, forward_migration.get_fingerprint()):
+                raise ValueError(
+                    "%s definition differs from the deployed one, run migrate before refresh."
+                    % cls._meta.db_table
                 )
-            else:
-                cursor.execute("REFRESH MATERIALIZED VIEW %s;" % cls._meta.db_table)
+        rebuild_materialized_table(
+            connection, cls._meta.db_table, forward_migration.view_definition
+        )
+
+    @classmethod
+    async def arefresh(
+        cls,
+        using=None,
+        concurrently=False,
+        strategy=None,
+        statement_timeout=None,
+        lock=None,
+        lock_timeout=None,
+    ) -> bool:
+        """
+        Async refresh, runs on a separate thread and connection (not on the thread of sync_to_async calls),
+        so refreshes of different views can run at the same time, see also refresh.arefresh_all.
+        """
+        from django_db_views.refresh import arefresh_view
+
+        return (
+            await arefresh_view(
+                cls,
+                using,
+                concurrently=concurrently,
+                strategy=strategy,
+                statement_timeout=statement_timeout,
+                lock=lock,
+                lock_timeout=lock_timeout,
+            )
+            is not None
+        )
+
+    @classmethod
+    def last_refreshed(cls, using=None) -> Optional[datetime]:
+        """Returns end time of the last recorded refresh, None if view was never refreshed."""
+        return get_last_refreshed(cls._meta.db_table, using or DEFAULT_DB_ALIAS)
+
+    @classmethod
+    def refresh_if_stale(
+        cls, max_age: Union[timedelta, int, float], using=None, **refresh_kwargs
+    ) -> bool:
+        """
+        Refreshes the view when last recorded refresh is older than max_age (timedelta or seconds),
+        or view was never refreshed. Returns True when view was refreshed.
+        With refresh lock, staleness is checked again when the lock is acquired,
+        so processes waiting for the same refresh do not refresh the view again.
+        """
+        if not isinstance(max_age, timedelta):
+            max_age = timedelta(seconds=max_age)
+        if not cls.is_stale(max_age, using):
+            return False
+        lock = refresh_kwargs.pop("lock", None)
+        if lock is None:
+            lock = cls.refresh_lock
+        if not lock:
+            return cls.refresh(using=using, **refresh_kwargs)
+        connection = connections[using or DEFAULT_DB_ALIAS]
+        with lock_timeout_context(connection, refresh_kwargs.get("lock_timeout")):
+            with refresh_lock(connection, cls._meta.db_table, lock) as locked:
+                # view could be refreshed by the refresh we waited for.
+                if not locked or not cls.is_stale(max_age, using):
+                    return False
+                # advisory locks are reentrant.
+                return cls.refresh(using=using, lock=lock, **refresh_kwargs)
+
+    @classmethod
+    def is_stale(cls, max_age: timedelta, using=None) -> bool:
+        last_refreshed = cls.last_refreshed(using=using)
+        return last_refreshed is None or timezone.now() - last_refreshed > max_age
@@ -0,0 +1,234 @@
+from functools import lru_cache
+from typing import Optional
+
+import sqlparse
+from django.apps import apps
+from sqlparse import tokens as T
+from sqlparse.sql import Identifier, IdentifierList, Parenthesis
+
+from django_db_views.db_view import DBViewsRegistry
+from django_db_views.view_definitions import get_view_definition_from_model
+
+
+def normalize_table_name(table_name: str) -> str:
+    # db_table of a view on specific schema is defined as 'schema"."table'
+    return table_name.replace('"."', ".").replace('"', "").lower()
+
+
+def get_referenced_table_names(sql: str) -> set:
+    """
+    Returns names of tables (or views) used after FROM / JOIN in the sql, including sub-queries.
+    Names of common table expressions are excluded, schema qualified names are returned as `schema.table`.
+    """
+    return set(_get_referenced_table_names(sql))
+
+
+@lru_cache(maxsize=1024)
+def _get_referenced_table_names(sql: str) -> frozenset:
+    # parsing is slow, same definitions are parsed by app scope and dependency graph.
+    table_names = set()
+    cte_names = set()
+    for statement in sqlparse.parse(sql):
+        _collect_table_names(statement, table_names, cte_names)
+    return frozenset(table_names - cte_names)
+
+
+def _collect_table_names(token_list, table_names: set, cte_names: set) -> None:
+    is_table_expected = False
+    is_cte_expected = False
+    for token in token_list.tokens:
+        if token.is_whitespace or token.ttype in T.Comment:
+            continue
+        if token.ttype in T.Keyword:
+            normalized = token.normalized
+            is_cte_expected = token.ttype is T.Keyword.CTE
+            is_table_expected = normalized == "FROM" or normalized.endswith("JOIN")
+            continue
+        if is_cte_expected or is_table_expected:
+            identifiers = (
+                token.get_identifiers()
+                if isinstance(token, IdentifierList)
+                else [token]
+            )
+            for identifier in identifiers:
+                if not isinstance(identifier, Identifier) or isinstance(
+                    identifier.token_first(), Parenthesis
+                ):
+                    continue
+                if is_cte_expected:
+                    cte_names.add(identifier.get_real_name().lower())
+                else:
+                    table_names.add(get_identifier_table_name(identifier))
+        is_table_expected = False
+        is_cte_expected = False
+        if token.is_group:
+            _collect_table_names(token, table_names, cte_names)
+
+
+def get_identifier_table_name(identifier: Identifier) -> str:
+    parent_name = identifier.get_parent_name()
+    real_name = identifier.get_real_name()
+    if parent_name:
+        return normalize_table_name("%s.%s" % (parent_name, real_name))
+    return normalize_table_name(real_name)
+
+
+class ViewDependencyGraph(object):
+    """
+    Dependencies of registered views, inferred from view definitions sql
+    and extended by the `dependencies` view attribute.
+    Table names are resolved against DBViewsRegistry and models db_table.
+    When engine is None, definitions of all engines are used.
+    When view_models are provided, only dependencies of these views are inferred.
+    """
+
+    def __init__(self, engine: Optional[str] = None, view_models=None):
+        self.engine = engine
+        self.tables = {}
+        for model in apps.get_models(include_auto_created=True):
+            self.tables[normalize_table_name(model._meta.db_table)] = model
+        for table_name, view_model in DBViewsRegistry.items():
+            self.tables[normalize_table_name(table_name)] = view_model
+
+        self.dependencies = {}
+        self.dependents = {}
+        if view_models is None:
+            view_models = DBViewsRegistry.values()
+        for view_model in view_models:
+            self.dependencies[view_model] = self.get_inferred_dependencies(
+                view_model
+            ) | self.get_declared_dependencies(view_model)
+        for view_model, dependencies in self.dependencies.items():
+            for dependency in dependencies:
+                self.dependents.setdefault(dependency, set()).add(view_model)
+
+    def get_inferred_dependencies(self, view_model) -> set:
+        view_definitions = get_view_definition_from_model(view_model, self.engine)
+        dependencies = set()
+        for definition in view_definitions.values():
+            for table_name in get_referenced_table_names(definition):
+                model = self.resolve_table_name(table_name)
+                if model is not None and model is not view_model:
+                    dependencies.add(model)
+        return dependencies
+
+    @staticmethod
+    def get_declared_dependencies(view_model) -> set:
+        """
+        Resolves `dependencies` attribute (autodetector operation dependencies) to models.
+        Migration dependencies are skipped.
+        """
+        dependencies = set()
+        for dependency in getattr(view_model, "dependencies", []):
+            app_label, model_name = dependency[0], dependency[1]
+            try:
+                model = apps.get_model(app_label, model_name)
+            except (LookupError, ValueError):
+                continue
+            dependencies.add(DBViewsRegistry.get(model._meta.db_table, model))
+        return dependencies
+
+    def resolve_table_name(self, table_name: str):
+        if table_name in self.tables:
+            return self.tables[table_name]
+        # schema qualified name of a model defined without schema (search path).
+        return self.tables.get(table_name.split(".")[-1])
+
+    @staticmethod
+    def is_view(model) -> bool:
+        return model._meta.db_table in DBViewsRegistry
+
+    def get_dependencies(self, view_model, recursive: bool = False) -> set:
+        """Returns views and regular models used by the view."""
+        return self._traverse(self.dependencies, view_model, recursive)
+
+    def get_view_dependencies(self, view_model, recursive: bool = False) -> set:
+        return set(filter(self.is_view, self.get_dependencies(view_model, recursive)))
+
+    def get_source_models(self, view_model) -> set:
+        """Returns regular models, that the view data comes from (directly or through other views)."""
+        return {
+            model
+            for model in self.get_dependencies(view_model, recursive=True)
+            if not self.is_view(model)
+        }
+
+    def get_dependents(self, model, recursive: bool = False) -> set:
+        """Returns views that use the model (regular model or view)."""
+        return self._traverse(self.dependents, model, recursive)
+
+    @staticmethod
+    def _traverse(edges: dict, node, recursive: bool) -> set:
+        if not recursive:
+            return set(edges.get(node, ()))
+        visited = set()
+        to_visit = list(edges.get(node, ()))
+        while to_visit:
+            current = to_visit.pop()
+            if current not in visited and current is not node:
+                visited.add(current)
+                to_visit.extend(edges.get(current, ()))
+        return visited
+
+    def get_dependencies_between(self, view_models) -> dict:
+        """
+        Maps each view model to views from the same list that it depends on.
+        Views that are not in the list are followed transitively,
+        so view -> other view -> view chains keep their order.
+        """
+        view_models = set(view_models)
+        dependencies = {}
+        for view_model in view_models:
+            dependencies[view_model] = set()
+            visited = set()
+            to_visit = list(self.get_view_dependencies(view_model))
+            while to_visit:
+                dependency = to_visit.pop()
+                if dependency in visited or dependency is view_model:
+                    continue
+                visited.add(dependency)
+                if dependency in view_models:
+                    dependencies[view_model].add(dependency)
+                else:
+                    to_visit.extend(self.get_view_dependencies(dependency))
+        return dependencies
+
+    def get_batches(self, view_models=None) -> list:
+        """
+        Groups view models (all registered by default) into batches,
+        views in a batch depend only on views from previous batches.
+        """
+        if view_models is None:
+            view_models = DBViewsRegistry.values()
+        pending = self.get_dependencies_between(view_models)
+        batches = []
+        done = set()
+        while pending:
+            batch = sorted(
+                (
+                    view_model
+                    for view_model, dependencies in pending.items()
+                    if dependencies <= done
+                ),
+                key=lambda view_model: view_model._meta.db_table,
+            )
+            if not batch:
+                raise ValueError(
+                    "Circular dependency between views: %s"
+                    % ", ".join(
+                        sorted(view_model._meta.db_table for view_model in pending)
+                    )
+                )
+            for view_model in batch:
+                del pending[view_model]
+            done.update(batch)
+            batches.append(batch)
+        return batches
+
+    def get_ordered_views(self, view_models=None) -> list:
+        """Returns view models ordered so that each view follows the views it depends on."""
+        return [
+            view_model
+            for batch in self.get_batches(view_models)
+            for view_model in batch
+        ]
@@ -0,0 +1,174 @@
+import re
+from typing import NamedTuple, Optional, Type
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from django_db_views.autodetector import ViewMigrationAutoDetector
+from django_db_views.db_view import DBView, DBMaterializedView, DBViewsRegistry
+from django_db_views.fingerprints import (
+    get_fingerprints,
+    is_fingerprint_tracking_enabled,
+)
+from django_db_views.refresh_strategies import is_materialized_view_emulated
+
+# drift statuses:
+#   missing - view is not deployed
+#   kind_changed - regular view deployed instead of materialized or vice versa
+#   changed - deployed definition differs from the model definition
+#   unverified - definition rewritten by the database (postgres, mysql), not deployed by view migrations,
+#       or table backed materialized view (sqlite, mysql) not deployed by view migrations
+OK = "ok"
+MISSING = "missing"
+KIND_CHANGED = "kind_changed"
+CHANGED = "changed"
+UNVERIFIED = "unverified"
+
+POSTGRES_VIEWS_QUERY = """
+    SELECT schemaname, viewname, false, definition,
+        array_position(current_schemas(false), schemaname::text)
+    FROM pg_views
+    WHERE schemaname NOT IN ('pg_catalog', 'information_schema')
+    UNION ALL
+    SELECT schemaname, matviewname, true, definition,
+        array_position(current_schemas(false), schemaname::text)
+    FROM pg_matviews
+    ORDER BY 5 NULLS LAST
+"""
+SQLITE_VIEWS_QUERY = "SELECT name, sql FROM sqlite_master WHERE type = 'view'"
+MYSQL_VIEWS_QUERY = """
+    SELECT table_name, view_definition
+    FROM information_schema.views
+    WHERE table_schema = DATABASE()
+"""
+SQLITE_CREATE_VIEW_PREFIX = re.compile(
+    r"^\s*CREATE\s+(?:TEMP\s+|TEMPORARY\s+)?VIEW\s+.+?\s+AS\s+", re.I | re.S
+)
+
+
+class DeployedView(NamedTuple):
+    table_name: str
+    materialized: bool
+    definition: str
+
+
+class ViewDrift(NamedTuple):
+    view_model: Type[DBView]
+    using: str
+    status: str
+    definition: str
+    deployed_definition: Optional[str] = None
+
+
+def get_deployed_views(connection) -> dict:
+    """
+    Deployed views of the database by table name, read with a single catalog query.
+    Postgres views are available by schema qualified name and by name when their schema is in the search path.
+    """
+    vendor = connection.vendor
+    deployed_views = {}
+    with connection.cursor() as cursor:
+        if vendor == "postgresql":
+            cursor.execute(POSTGRES_VIEWS_QUERY)
+            for schema, name, materialized, definition, position in cursor.fetchall():
+                view = DeployedView(name, materialized, definition)
+                deployed_views["%s.%s" % (schema, name)] = view
+                # rows are ordered by search path, first schema wins.
+                if position is not None:
+                    deployed_views.setdefault(name, view)
+        elif vendor == "sqlite":
+            cursor.execute(SQLITE_VIEWS_QUERY)
+            for name, sql in cursor.fetchall():
+                definition = SQLITE_CREATE_VIEW_PREFIX.sub("", sql, count=1)
+                deployed_views[name] = DeployedView(name, False, definition)
+        elif vendor == "mysql":
+            cursor.execute(MYSQL_VIEWS_QUERY)
+            for name, definition in cursor.fetchall():
+                deployed_views[name] = DeployedView(name, False, definition)
+        else:
+            raise NotImplementedError(
+                "Reading deployed views is not supported for %s." % vendor
+            )
+    return deployed_views
+
+
+def get_forward_migration(view_model, engine: str):
+    view_definition = ViewMigrationAutoDetector.get_view_definition_from_model(
+        view_model, engine=engine
+    )[engine]
+    forward_migration_class = ViewMigrationAutoDetector.get_forward_migration_class(
+        view_model
+    )
+    return forward_migration_class(
+        view_definition.strip(";"),
+        view_model._meta.db_table,
+        engine=engine,
+        indexes=ViewMigrationAutoDetector.get_view_indexes_from_model(
+            view_model, engine
+        ),
+    )
+
+
+def check_views_drift(view_models=None, using: Optional[str] = None) -> list:
+    """
+    Compares definitions of view models (all views defined for the database engine by default)
+    with views deployed at the database. Deployed views and fingerprints are read once.
+    View is up to date when view migrations deployed the same definition (fingerprint),
+    otherwise deployed definition is compared with the model definition after sql normalization.
+    Postgres and mysql store rewritten definitions, so they usually can't be verified without fingerprint.
+    Returns ViewDrift per view model.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    engine = connection.settings_dict["ENGINE"]
+    if view_models is None:
+        view_models = DBViewsRegistry.get_by_database(using)
+    deployed_views = get_deployed_views(connection)
+    fingerprints = {}
+    if is_fingerprint_tracking_enabled():
+        fingerprints = get_fingerprints(connection)
+    tables = None
+    if is_materialized_view_emulated(connection):
+        with connection.cursor() as cursor:
+            tables = set(connection.introspection.table_names(cursor))
+
+    results = []
+    for view_model in view_models:
+        table_name = view_model._meta.db_table
+        forward_migration = get_forward_migration(view_model, engine)
+        definition = forward_migration.view_definition
+        deployed_view = deployed_views.get(table_name)
+        if tables is not None and issubclass(view_model, DBMaterializedView):
+            # table backed materialized view, only fingerprint knows its definition.
+            if table_name not in tables:
+                status = KIND_CHANGED if deployed_view is not None else MISSING
+            elif fingerprints.get(table_name) == forward_migration.get_fingerprint():
+                status = OK
+            elif table_name in fingerprints:
+                status = CHANGED
+            else:
+                status = UNVERIFIED
+        elif deployed_view is None:
+            status = MISSING
+        elif deployed_view.materialized != issubclass(view_model, DBMaterializedView):
+            status = KIND_CHANGED
+        elif fingerprints.get(table_name) == forward_migration.get_fingerprint():
+            # deployed by view migrations with the same definition, no need to normalize.
+            status = OK
+        elif ViewMigrationAutoDetector.is_same_views(
+            deployed_view.definition.strip().rstrip(";"), definition
+        ):
+            status = OK
+        elif table_name in fingerprints or connection.vendor == "sqlite":
+            status = CHANGED
+        else:
+            status = UNVERIFIED
+        results.append(
+            ViewDrift(
+                view_model,
+                using,
+                status,
+                definition,
+                deployed_view.definition if deployed_view is not None else None,
+            )
+        )
+    return results
@@ -0,0 +1,180 @@
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+
+FINGERPRINT_TABLE = "django_db_views_fingerprint"
+# connection attribute, name of the database where the fingerprints table is known to exist.
+FINGERPRINT_TABLE_ATTRIBUTE = "_django_db_views_fingerprint_table"
+
+
+def is_fingerprint_tracking_enabled() -> bool:
+    """
+    Settings:
+        DB_VIEWS_FINGERPRINTS - when False view migrations always drop and create views (enabled by default).
+    """
+    return getattr(settings, "DB_VIEWS_FINGERPRINTS", True)
+
+
+def get_view_fingerprint(create_sql: str, indexes: Optional[dict] = None) -> str:
+    """Hash of deployed view, its create statement and create index statements."""
+    content = "\n".join([create_sql.strip(), *sorted((indexes or {}).values())])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def ensure_fingerprint_table(connection) -> bool:
+    """
+    Fingerprints table is not a django model on purpose, flush (e.g. transactional tests)
+    must not remove fingerprints of views which are still deployed. Created on the first write.
+    Returns True when the table was created.
+    """
+    if has_fingerprint_table(connection):
+        return False
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS %s ("
+            "%s varchar(255) NOT NULL, "
+            "%s varchar(100) NOT NULL, "
+            "%s varchar(64) NOT NULL, "
+            "PRIMARY KEY (%s, %s))"
+            % (
+                quote_name(FINGERPRINT_TABLE),
+                quote_name("table_name"),
+                quote_name("engine"),
+                quote_name("fingerprint"),
+                quote_name("table_name"),
+                quote_name("engine"),
+            )
+        )
+    remember_fingerprint_table(connection)
+    return True
+
+
+def has_fingerprint_table(connection) -> bool:
+    """Checked once per connection, existing table is remembered."""
+    if getattr(connection, FINGERPRINT_TABLE_ATTRIBUTE, None) == database_name(
+        connection
+    ):
+        return True
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [FINGERPRINT_TABLE])
+            exists = cursor.fetchone()[0]
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FINGERPRINT_TABLE],
+            )
+            exists = cursor.fetchone() is not None
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT 1 FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [FINGERPRINT_TABLE],
+            )
+            exists = cursor.fetchone() is not None
+        else:
+            exists = FINGERPRINT_TABLE in connection.introspection.table_names(cursor)
+    if exists:
+        remember_fingerprint_table(connection)
+    return exists
+
+
+def database_name(connection) -> str:
+    # connection is switched to the test database by test runners.
+    return connection.settings_dict["NAME"]
+
+
+def remember_fingerprint_table(connection) -> None:
+    # table created in a transaction exists only when the transaction commits.
+    name = database_name(connection)
+
+    def remember():
+        setattr(connection, FINGERPRINT_TABLE_ATTRIBUTE, name)
+
+    if connection.in_atomic_block:
+        transaction.on_commit(remember, using=connection.alias)
+    else:
+        remember()
+
+
+def forget_fingerprint_table(connection) -> None:
+    """Table existence is checked again, e.g. after the table was dropped."""
+    if hasattr(connection, FINGERPRINT_TABLE_ATTRIBUTE):
+        delattr(connection, FINGERPRINT_TABLE_ATTRIBUTE)
+
+
+def get_fingerprints(connection) -> dict:
+    """
+    Returns fingerprint per table name, of views deployed with the connection engine.
+    Reading does not create the table, without it there are no fingerprints.
+    """
+    quote_name = connection.ops.quote_name
+    if not has_fingerprint_table(connection):
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT %s, %s FROM %s WHERE %s = %%s"
+            % (
+                quote_name("table_name"),
+                quote_name("fingerprint"),
+                quote_name(FINGERPRINT_TABLE),
+                quote_name("engine"),
+            ),
+            [connection.settings_dict["ENGINE"]],
+        )
+        return dict(cursor.fetchall())
+
+
+def get_fingerprint(connection, table_name: str) -> Optional[str]:
+    quote_name = connection.ops.quote_name
+    if not has_fingerprint_table(connection):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT %s FROM %s WHERE %s = %%s AND %s = %%s"
+            % (
+                quote_name("fingerprint"),
+                quote_name(FINGERPRINT_TABLE),
+                quote_name("table_name"),
+                quote_name("engine"),
+            ),
+            [table_name, connection.settings_dict["ENGINE"]],
+        )
+        row = cursor.fetchone()
+    return row[0] if row is not None else None
+
+
+def set_fingerprint(connection, table_name: str, fingerprint: Optional[str]) -> None:
+    """Stores fingerprint of deployed view, None removes it (view was dropped)."""
+    quote_name = connection.ops.quote_name
+    engine = connection.settings_dict["ENGINE"]
+    if fingerprint is None:
+        # nothing to remove without the table
+        created = not has_fingerprint_table(connection)
+    else:
+        created = ensure_fingerprint_table(connection)
+    with connection.cursor() as cursor:
+        if not created:
+            cursor.execute(
+                "DELETE FROM %s WHERE %s = %%s AND %s = %%s"
+                % (
+                    quote_name(FINGERPRINT_TABLE),
+                    quote_name("table_name"),
+                    quote_name("engine"),
+                ),
+                [table_name, engine],
+            )
+        if fingerprint is not None:
+            cursor.execute(
+                "INSERT INTO %s (%s, %s, %s) VALUES (%%s, %%s, %%s)"
+                % (
+                    quote_name(FINGERPRINT_TABLE),
+                    quote_name("table_name"),
+                    quote_name("engine"),
+                    quote_name("fingerprint"),
+                ),
+                [table_name, engine, fingerprint],
+            )
@@ -2,6 +2,8 @@ from django.apps import apps
 from django.db import connection
 
 from django_db_views.autodetector import ViewMigrationAutoDetector
+from django_db_views.dependency_graph import ViewDependencyGraph
+from django_db_views.fingerprints import get_fingerprints
 
 try:
     import pytest
@@ -9,6 +11,91 @@ except ImportError:
     raise Exception("fixtures are available only for pytest.")
 
 
+def get_ordered_view_models(graph: ViewDependencyGraph) -> list:
+    view_models = list(ViewMigrationAutoDetector.get_current_view_models().values())
+    try:
+        return graph.get_ordered_views(view_models)
+    except ValueError:  # circular dependency, keep models order.
+        return view_models
+
+
+def create_views(db_connection, keepdb: bool = False) -> list:
+    """
+    Creates views of current models (tests without migrations), in dependency order in one schema editor pass.
+    With keepdb, views deployed with the same definition (fingerprint) are kept,
+    changed views are recreated together with views that depend on them.
+    Returns created view models.
+    """
+    engine = db_connection.settings_dict["ENGINE"]
+    graph = ViewDependencyGraph(engine)
+    view_models = get_ordered_view_models(graph)
+    forward_migrations = {}
+    for view_model in view_models:
+        view_definition = ViewMigrationAutoDetector.get_view_definition_from_model(
+            view_model, engine=engine
+        )[engine]
+        forward_migration_class = ViewMigrationAutoDetector.get_forward_migration_class(
+            view_model
+        )
+        forward_migrations[view_model] = forward_migration_class(
+            view_definition.strip(";"),
+            view_model._meta.db_table,
+            engine=engine,
+            indexes=ViewMigrationAutoDetector.get_view_indexes_from_model(
+                view_model, engine
+            ),
+        )
+
+    changed_view_models = set(view_models)
+    if keepdb:
+        fingerprints = get_fingerprints(db_connection)
+        existing_tables = set(
+            db_connection.introspection.table_names(include_views=True)
+        )
+        changed_view_models = set()
+        for view_model, forward_migration in forward_migrations.items():
+            table_name = view_model._meta.db_table
+            if (
+                table_name not in existing_tables
+                or fingerprints.get(table_name) != forward_migration.get_fingerprint()
+            ):
+                changed_view_models.add(view_model)
+                changed_view_models.update(
+                    filter(graph.is_view, graph.get_dependents(view_model, True))
+                )
+    view_models = [
+        view_model for view_model in view_models if view_model in changed_view_models
+    ]
+
+    with db_connection.schema_editor() as schema_editor:
+        if keepdb:
+            # views that depend on changed view have to be dropped first.
+            for view_model in reversed(view_models):
+                get_backward_migration(view_model, engine)(apps, schema_editor)
+        # migrations store fingerprints of created views.
+        for view_model in view_models:
+            forward_migrations[view_model](apps, schema_editor)
+    return view_models
+
+
+def drop_views(db_connection) -> None:
+    engine = db_connection.settings_dict["ENGINE"]
+    with db_connection.schema_editor() as schema_editor:
+        for view_model in reversed(
+            get_ordered_view_models(ViewDependencyGraph(engine))
+        ):
+            get_backward_migration(view_model, engine)(apps, schema_editor)
+
+
+def get_backward_migration(view_model, engine: str):
+    # backward migration without definition drops the view.
+    return ViewMigrationAutoDetector.get_backward_migration_class(view_model)(
+        "",
+        view_model._meta.db_table,
+        engine=engine,
+    )
+
+
 @pytest.fixture(autouse=True, scope="session")
 def django_db_views_setup(
     django_db_setup,
@@ -18,39 +105,12 @@ def django_db_views_setup(
     django_db_keepdb: bool,
 ) -> None:
     def no_migrations_tear_up() -> None:
-        view_models = ViewMigrationAutoDetector.get_current_view_models()
-        with django_db_blocker.unblock(), connection.schema_editor() as schema_editor:
-            engine = schema_editor.connection.settings_dict["ENGINE"]
-            for view_model in view_models.values():
-                view_definition = (
-                    ViewMigrationAutoDetector.get_view_definition_from_model(
-                        view_model
-                    )[engine]
-                )
-                forward_migration = (
-                    ViewMigrationAutoDetector.get_forward_migration_class(view_model)(
-                        view_definition.strip(";"),
-                        view_model._meta.db_table,
-                        engine=engine,
-                    )
-                )
-                # run migration
-                forward_migration(apps, schema_editor)
+        with django_db_blocker.unblock():
+            create_views(connection, keepdb=django_db_keepdb)
 
     def no_migrations_teardown() -> None:
-        view_models = ViewMigrationAutoDetector.get_current_view_models()
-        with django_db_blocker.unblock(), connection.schema_editor() as schema_editor:
-            engine = schema_editor.connection.settings_dict["ENGINE"]
-            for view_model in view_models.values():
-                backward_migration = (
-                    ViewMigrationAutoDetector.get_backward_migration_class(view_model)(
-                        "",
-                        view_model._meta.db_table,
-                        engine=engine,
-                    )
-                )
-                # run migration
-                backward_migration(apps, schema_editor)
+        with django_db_blocker.unblock():
+            drop_views(connection)
 
     if not django_db_use_migrations:
         no_migrations_tear_up()
@@ -0,0 +1,61 @@
+import warnings
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import Index
+from django.db.utils import load_backend
+
+
+class UniqueIndex(Index):
+    """
+    Unique index for materialized views (they can't have unique constraints).
+    Required by refresh(concurrently=True).
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        statement = super().create_sql(model, schema_editor, using=using, **kwargs)
+        statement.template = statement.template.replace(
+            "CREATE INDEX", "CREATE UNIQUE INDEX", 1
+        )
+        return statement
+
+
+def get_connection_for_engine(engine: str):
+    """
+    Returns connection that uses the engine. If there is no such database,
+    returns not connected wrapper of default database settings with the engine,
+    None when the backend can't be loaded (e.g. its driver is not installed).
+    """
+    # connections are created only for the matching database, drivers of other databases may be missing.
+    databases = connections.databases
+    try:
+        for alias, settings_dict in databases.items():
+            if settings_dict["ENGINE"] == engine:
+                return connections[alias]
+        backend = load_backend(engine)
+    except (ImproperlyConfigured, ImportError):
+        return None
+    settings_dict = {**databases[DEFAULT_DB_ALIAS], "ENGINE": engine}
+    return backend.DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+
+
+def get_view_indexes_from_model(view_model, engine: str) -> dict:
+    """
+    Returns create index sql per index name, for indexes defined in model Meta.indexes.
+    Sql is stored at view migrations, same as view definition.
+    Indexes are skipped for engines whose backend can't be loaded.
+    """
+    if not view_model._meta.indexes:
+        return {}
+    connection = get_connection_for_engine(engine)
+    if connection is None:
+        warnings.warn(
+            "Indexes of %s are skipped for %s, database backend can't be loaded."
+            % (view_model._meta.db_table, engine)
+        )
+        return {}
+    schema_editor = connection.SchemaEditorClass(connection)
+    return {
+        index.name: str(index.create_sql(view_model, schema_editor))
+        for index in view_model._meta.indexes
+    }
@@ -0,0 +1,34 @@
+from django.apps import apps
+
+
+def get_view_label(view_model) -> str:
+    return "%s.%s" % (view_model._meta.app_label, view_model.__name__)
+
+
+def get_view_models(labels, view_models: list, using: str, kind: str = "view") -> list:
+    """
+    Selects view models by "app_label" or "app_label.ViewModel" labels (all view models without labels),
+    view_models are views defined for the database.
+    Raises LookupError for unknown apps and views.
+    """
+    if not labels:
+        return view_models
+    selected = []
+    for label in labels:
+        app_label, _, model_name = label.partition(".")
+        apps.get_app_config(app_label)
+        matching = [
+            view_model
+            for view_model in view_models
+            if view_model._meta.app_label == app_label
+            and (not model_name or view_model._meta.model_name == model_name.lower())
+        ]
+        if model_name and not matching:
+            raise LookupError(
+                "%s is not a %s of app '%s' defined for database '%s'."
+                % (model_name, kind, app_label, using)
+            )
+        selected.extend(
+            view_model for view_model in matching if view_model not in selected
+        )
+    return selected
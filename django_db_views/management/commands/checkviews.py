@@ -0,0 +1,68 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_db_views.db_view import DBViewsRegistry
+from django_db_views.drift import check_views_drift, OK
+from django_db_views.labels import get_view_label, get_view_models
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares view definitions of models with views deployed at the database "
+        "and reports views that are missing or differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "args",
+            metavar="app_label[.ViewModel]",
+            nargs="*",
+            help="Check only views of the app(s) or the given view models (all by default).",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to check views at. Defaults to the "default" database.',
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with a non-zero status if any view drifted.",
+        )
+
+    def handle(self, *labels, **options):
+        using = options["database"]
+        try:
+            view_models = get_view_models(
+                labels, DBViewsRegistry.get_by_database(using), using
+            )
+        except LookupError as e:
+            raise CommandError(str(e))
+        start = time.monotonic()
+        try:
+            results = check_views_drift(view_models, using=using)
+        except NotImplementedError as e:
+            raise CommandError(str(e))
+        duration = time.monotonic() - start
+
+        drifted = [result for result in results if result.status != OK]
+        for result in results:
+            if result.status != OK or options["verbosity"] >= 2:
+                self.write_result(result, options["verbosity"])
+        self.stdout.write(
+            "Checked %s view(s) in %.3fs, %s drifted."
+            % (len(results), duration, len(drifted))
+        )
+        if drifted and options["check"]:
+            sys.exit(1)
+
+    def write_result(self, result, verbosity: int):
+        label = get_view_label(result.view_model)
+        style = self.style.SUCCESS if result.status == OK else self.style.ERROR
+        self.stdout.write("  %s %s" % (label, style(result.status.upper())))
+        if result.status != OK and verbosity >= 2:
+            self.stdout.write("    model: %s" % result.definition)
+            self.stdout.write("    database: %s" % result.deployed_definition)
@@ -3,11 +3,12 @@ import sys
 from django.apps import apps
 from django.db.migrations.loader import MigrationLoader
 from django.db.migrations.questioner import InteractiveMigrationQuestioner
-from django.db.migrations.state import ProjectState
 from django.core.management.commands.makemigrations import Command as MakemigrationsCommand
 
 from django_db_views.autodetector import ViewMigrationAutoDetector
 from django_db_views.context_manager import view_migration_context
+from django_db_views.normalization import get_sql_normalization_cache
+from django_db_views.state import get_app_labels_scope, get_view_migrations_state, get_view_models_state
 
 
 class Command(MakemigrationsCommand):
@@ -74,14 +75,18 @@ class Command(MakemigrationsCommand):
         # load migrations using same loader as in regular command
         loader = MigrationLoader(None, ignore_no_migrations=True)
 
-        from_state = loader.project_state()
-        to_state = ProjectState.from_apps(apps)
+        # with app labels, we build state only for them and apps they depend on.
+        scope = get_app_labels_scope(app_labels, loader.graph) if app_labels else None
+        # states contain only views, detection does not need other models.
+        from_state = get_view_migrations_state(loader, scope)
+        to_state = get_view_models_state(scope)
 
         # overwritten autodetector. They detect only view changes.
         autodetector = ViewMigrationAutoDetector(
             from_state,
             to_state,
-            questioner=InteractiveMigrationQuestioner(specified_apps=app_labels, dry_run=self.dry_run)
+            questioner=InteractiveMigrationQuestioner(specified_apps=app_labels, dry_run=self.dry_run),
+            app_labels=scope,
         )
 
         changes = autodetector.changes(
@@ -90,6 +95,7 @@ class Command(MakemigrationsCommand):
             convert_apps=app_labels or None,
             migration_name=self.migration_name,
         )
+        get_sql_normalization_cache().save()
 
         # it's copy paste from make migration command
         if not changes:
@@ -0,0 +1,189 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_db_views.labels import get_view_label, get_view_models
+from django_db_views.refresh import (
+    get_materialized_views,
+    get_refresh_batches,
+    get_unpopulated_views,
+    refresh_all,
+)
+from django_db_views.refresh_strategies import (
+    REFRESH,
+    CONCURRENTLY,
+    SWAP,
+    LOCK_WAIT,
+    LOCK_SKIP,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes materialized views in dependency order. "
+        "Independent views can be refreshed in parallel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "args",
+            metavar="app_label[.ViewModel]",
+            nargs="*",
+            help="Refresh only views of the app(s) or the given view models (all by default).",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='Nominates a database to refresh views at. Defaults to the "default" database.',
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            help="Number of views refreshed at the same time (separate connections).",
+        )
+        parser.add_argument(
+            "--concurrently",
+            action="store_true",
+            help="Use REFRESH MATERIALIZED VIEW CONCURRENTLY (requires an unique index).",
+        )
+        parser.add_argument(
+            "--strategy",
+            choices=[REFRESH, CONCURRENTLY, SWAP],
+            default=None,
+            help="Refresh strategy, by default view refresh_strategy is used.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=None,
+            help="Per view timeout in seconds, refresh statements are cancelled after it (postgres only).",
+        )
+        parser.add_argument(
+            "--lock",
+            choices=[LOCK_WAIT, LOCK_SKIP],
+            default=None,
+            help="Only one refresh of a view runs at once (postgres advisory lock), "
+            "wait for the running refresh or skip the view. By default view refresh_lock is used.",
+        )
+        parser.add_argument(
+            "--lock-timeout",
+            type=float,
+            default=None,
+            help="Seconds of waiting for the refresh lock and locks of the view (postgres only).",
+        )
+        parser.add_argument(
+            "--unpopulated",
+            action="store_true",
+            help="Populate only views created WITH NO DATA and not populated yet (regular refresh), "
+            "e.g. after deploy.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Just show in which order views would be refreshed.",
+        )
+
+    def handle(self, *labels, **options):
+        using = options["database"]
+        if options["parallel"] < 1:
+            raise CommandError("--parallel must be a positive number.")
+        try:
+            view_models = get_view_models(
+                labels,
+                get_materialized_views(using),
+                using,
+                kind="materialized view",
+            )
+        except LookupError as e:
+            raise CommandError(str(e))
+        if options["unpopulated"]:
+            view_models = get_unpopulated_views(view_models, using=using)
+        if not view_models:
+            self.stdout.write("No materialized views to refresh.")
+            return
+        try:
+            batches = get_refresh_batches(view_models, using=using)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options["dry_run"]:
+            for number, batch in enumerate(batches, start=1):
+                self.stdout.write("Batch %s:" % number)
+                for view_model in batch:
+                    self.stdout.write("  %s" % get_view_label(view_model))
+            return
+
+        refresh_kwargs = {
+            "statement_timeout": options["timeout"],
+            "lock": options["lock"],
+            "lock_timeout": options["lock_timeout"],
+        }
+        if options["unpopulated"]:
+            # not populated view is not readable anyway, concurrently is not possible.
+            refresh_kwargs["strategy"] = REFRESH
+        elif options["strategy"] is not None:
+            refresh_kwargs["strategy"] = options["strategy"]
+        elif options["concurrently"]:
+            refresh_kwargs["concurrently"] = True
+
+        start = time.monotonic()
+        results = refresh_all(
+            view_models,
+            using=using,
+            workers=options["parallel"],
+            fail_silently=True,
+            callback=self.write_result,
+            **refresh_kwargs,
+        )
+        duration = time.monotonic() - start
+
+        refreshed = [result for result in results if result.duration is not None]
+        failed = [result for result in results if result.exception is not None]
+        skipped = [result for result in results if result.skipped]
+        busy = [result for result in results if result.busy]
+        self.stdout.write(
+            "Refreshed %s of %s view(s) in %.3fs (%s failed, %s skipped, %s busy)."
+            % (
+                len(refreshed),
+                len(results),
+                duration,
+                len(failed),
+                len(skipped),
+                len(busy),
+            )
+        )
+        if refreshed and options["verbosity"] >= 2:
+            self.stdout.write("Slowest:")
+            for result in sorted(refreshed, key=lambda r: r.duration, reverse=True)[:5]:
+                self.stdout.write(
+                    "  %s %.3fs" % (get_view_label(result.view_model), result.duration)
+                )
+        if failed or skipped:
+            raise CommandError(
+                "Refresh failed for: %s"
+                % ", ".join(
+                    get_view_label(result.view_model) for result in failed + skipped
+                )
+            )
+
+    def write_result(self, result):
+        label = get_view_label(result.view_model)
+        if result.skipped:
+            self.stdout.write(
+                "  %s %s (dependency failed)" % (label, self.style.WARNING("SKIPPED"))
+            )
+        elif result.busy:
+            self.stdout.write(
+                "  %s %s (other refresh is running)"
+                % (label, self.style.WARNING("BUSY"))
+            )
+        elif result.exception is not None:
+            self.stdout.write(
+                "  %s %s: %s" % (label, self.style.ERROR("FAILED"), result.exception)
+            )
+        else:
+            self.stdout.write(
+                "  %s %s %.3fs" % (label, self.style.SUCCESS("OK"), result.duration)
+            )
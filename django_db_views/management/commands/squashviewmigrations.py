@@ -0,0 +1,149 @@
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.core.management.commands.squashmigrations import (
+    Command as SquashmigrationsCommand,
+)
+from django.db import migrations
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.migration import SwappableTuple
+from django.db.migrations.optimizer import MigrationOptimizer
+from django.db.migrations.writer import MigrationWriter
+
+from django_db_views.squash import squash_view_operations
+
+
+class Command(SquashmigrationsCommand):
+    help = (
+        "Squashes migrations of an app (from first until specified) into a single new one, "
+        "view operations are collapsed into one operation per view and engine with the latest definition."
+    )
+
+    def handle(self, **options):
+        self.verbosity = options["verbosity"]
+        self.interactive = options["interactive"]
+        app_label = options["app_label"]
+        start_migration_name = options["start_migration_name"]
+        migration_name = options["migration_name"]
+        squashed_name = options["squashed_name"]
+        try:
+            apps.get_app_config(app_label)
+        except LookupError as err:
+            raise CommandError(str(err))
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        if app_label not in loader.migrated_apps:
+            raise CommandError(
+                "App '%s' does not have migrations (so squashviewmigrations on "
+                "it makes no sense)" % app_label
+            )
+
+        migration = self.find_migration(loader, app_label, migration_name)
+        app_migrations = [
+            loader.get_migration(al, mn)
+            for al, mn in loader.graph.forwards_plan(
+                (migration.app_label, migration.name)
+            )
+            if al == migration.app_label
+        ]
+        start_index = 0
+        if start_migration_name:
+            start_migration = self.find_migration(
+                loader, app_label, start_migration_name
+            )
+            try:
+                start_index = app_migrations.index(start_migration)
+            except ValueError:
+                raise CommandError(
+                    "The migration '%s' cannot be found. Maybe it comes after "
+                    "the migration '%s'?" % (start_migration, migration)
+                )
+        migrations_to_squash = app_migrations[start_index:]
+
+        if self.verbosity > 0 or self.interactive:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING("Will squash the following migrations:")
+            )
+            for smigration in migrations_to_squash:
+                self.stdout.write(" - %s" % smigration.name)
+            if self.interactive:
+                answer = input("Do you wish to proceed? [y/N] ")
+                if not answer or answer[0].lower() != "y":
+                    return
+
+        # same as squashmigrations, external dependencies and all dependencies of the first migration.
+        operations = []
+        dependencies = set()
+        replaces = []
+        for number, smigration in enumerate(migrations_to_squash):
+            if smigration.replaces:
+                raise CommandError(
+                    "You cannot squash squashed migrations! "
+                    "Please transition it to a normal migration first."
+                )
+            operations.extend(smigration.operations)
+            replaces.append((smigration.app_label, smigration.name))
+            for dependency in smigration.dependencies:
+                if isinstance(dependency, SwappableTuple):
+                    if settings.AUTH_USER_MODEL == dependency.setting:
+                        dependencies.add(("__setting__", "AUTH_USER_MODEL"))
+                    else:
+                        dependencies.add(dependency)
+                elif dependency[0] != smigration.app_label or number == 0:
+                    dependencies.add(dependency)
+
+        # view state before squashed migrations is restored by backward operations.
+        previous_operations = [
+            operation
+            for smigration in app_migrations[:start_index]
+            for operation in smigration.operations
+        ]
+        new_operations = squash_view_operations(operations, previous_operations)
+        if not options["no_optimize"]:
+            new_operations = MigrationOptimizer().optimize(new_operations, app_label)
+        if self.verbosity > 0:
+            self.stdout.write(
+                "  Squashed from %s operations to %s operations."
+                % (len(operations), len(new_operations))
+            )
+
+        subclass = type(
+            "Migration",
+            (migrations.Migration,),
+            {
+                "dependencies": dependencies,
+                "operations": new_operations,
+                "replaces": replaces,
+            },
+        )
+        if start_migration_name:
+            if squashed_name:
+                prefix, _ = start_migration.name.split("_", 1)
+                name = "%s_%s" % (prefix, squashed_name)
+            else:
+                name = "%s_squashed_%s" % (start_migration.name, migration.name)
+            new_migration = subclass(name, app_label)
+        else:
+            name = "0001_%s" % (squashed_name or "squashed_%s" % migration.name)
+            new_migration = subclass(name, app_label)
+            new_migration.initial = True
+
+        writer = MigrationWriter(new_migration, options.get("include_header", True))
+        if os.path.exists(writer.path):
+            raise CommandError(
+                "Migration %s already exists. Use a different name." % new_migration.name
+            )
+        with open(writer.path, "w", encoding="utf-8") as fh:
+            fh.write(writer.as_string())
+
+        if self.verbosity > 0:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    "Created new squashed migration %s" % writer.path
+                )
+                + "\n"
+                "  Migrations depending on squashed ones (other apps included) use it through replaces.\n"
+                "  Once all databases applied the squashed migrations, you can delete them\n"
+                "  and remove replaces, as with squashmigrations."
+            )
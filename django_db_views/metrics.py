@@ -0,0 +1,28 @@
+import warnings
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+REFRESH_METRIC = "db_views.refresh"
+VIEW_DDL_METRIC = "db_views.view_ddl"
+
+
+def get_metrics_callback():
+    """
+    Settings:
+        DB_VIEWS_METRICS_CALLBACK - callable or its dotted path, called with (metric name, duration, tags dict).
+    """
+    callback = getattr(settings, "DB_VIEWS_METRICS_CALLBACK", None)
+    if isinstance(callback, str):
+        callback = import_string(callback)
+    return callback
+
+
+def report_metric(name: str, duration: float, **tags):
+    callback = get_metrics_callback()
+    if callback is None:
+        return
+    try:
+        callback(name, duration, tags)
+    except Exception as e:  # monitoring should not break refreshes or migrations.
+        warnings.warn("Metrics callback failed for %s: %r" % (name, e))
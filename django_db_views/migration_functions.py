@@ -1,82 +1,316 @@
-from typing import TypeVar
+import time
+from typing import TypeVar, Optional
 
+from django.db import transaction, DatabaseError
 from django.db.backends.base.schema import BaseDatabaseSchemaEditor
 from django.db.migrations.state import StateApps
 from django.utils.deconstruct import deconstructible
 
+from django_db_views.fingerprints import (
+    get_view_fingerprint,
+    get_fingerprint,
+    set_fingerprint,
+    is_fingerprint_tracking_enabled,
+)
+from django_db_views.metrics import report_metric, VIEW_DDL_METRIC
+from django_db_views.refresh_strategies import is_materialized_view_emulated
+from django_db_views.signals import pre_view_ddl, post_view_ddl
+
 
 DatabaseSchemaEditor = TypeVar("DatabaseSchemaEditor", bound=BaseDatabaseSchemaEditor)
 
 
+def execute_view_ddl(
+    schema_editor: DatabaseSchemaEditor, sql: str, sender, table_name: str
+):
+    """Executes view ddl, its time is reported by pre/post_view_ddl signals and metrics callback."""
+    if schema_editor.collect_sql:  # sqlmigrate, nothing is executed.
+        schema_editor.execute(sql)
+        return
+    connection = schema_editor.connection
+    engine = connection.settings_dict["ENGINE"]
+    pre_view_ddl.send(
+        sender=sender,
+        table_name=table_name,
+        using=connection.alias,
+        engine=engine,
+        sql=sql,
+    )
+    exception = None
+    start = time.monotonic()
+    try:
+        schema_editor.execute(sql)
+    except Exception as e:
+        exception = e
+        raise
+    finally:
+        duration = time.monotonic() - start
+        post_view_ddl.send(
+            sender=sender,
+            table_name=table_name,
+            using=connection.alias,
+            engine=engine,
+            sql=sql,
+            duration=duration,
+            exception=exception,
+        )
+        report_metric(
+            VIEW_DDL_METRIC,
+            duration,
+            view=table_name,
+            using=connection.alias,
+            engine=engine,
+            success=exception is None,
+        )
+
+
+def store_fingerprint(
+    schema_editor: DatabaseSchemaEditor, table_name: str, fingerprint: Optional[str]
+):
+    if schema_editor.collect_sql or not is_fingerprint_tracking_enabled():
+        return
+    set_fingerprint(schema_editor.connection, table_name, fingerprint)
+
+
 class ViewMigration(object):
     DROP_COMMAND_TEMPLATE: str
     CREATE_COMMAND_TEMPLATE: str
+    # Used instead of drop and create, when view columns stays compatible.
+    REPLACE_COMMAND_TEMPLATE: Optional[str] = None
+    REPLACE_SUPPORTED_VENDORS = ("postgresql", "mysql")
 
-    def __init__(self, view_definition: str, table_name: str, engine=None):
+    def __init__(
+        self, view_definition: str, table_name: str, engine=None, indexes=None
+    ):
         # if provided engine is None, then we are assuming that engine is same as db engine.
         # We do that to keep backward compatibility.
         self.view_engine = engine
         self.view_definition = view_definition
         self.table_name = table_name
+        # create index sql per index name, indexes are created every time view is created.
+        self.indexes = indexes or {}
+
+    def is_engine_matching(self, schema_editor: DatabaseSchemaEditor) -> bool:
+        return (
+            self.view_engine is None
+            or self.view_engine == schema_editor.connection.settings_dict["ENGINE"]
+        )
+
+    def get_drop_command_template(self, connection) -> str:
+        return self.DROP_COMMAND_TEMPLATE
+
+    def get_create_command_template(self, connection) -> str:
+        return self.CREATE_COMMAND_TEMPLATE
+
+    def get_fingerprint(self) -> str:
+        return get_view_fingerprint(
+            self.CREATE_COMMAND_TEMPLATE % (self.table_name, self.view_definition),
+            self.indexes,
+        )
+
+    def create_indexes(self, schema_editor: DatabaseSchemaEditor):
+        for index_sql in self.indexes.values():
+            execute_view_ddl(schema_editor, index_sql, type(self), self.table_name)
+
+    def drop_view(self, schema_editor: DatabaseSchemaEditor, store: bool = True):
+        execute_view_ddl(
+            schema_editor,
+            self.get_drop_command_template(schema_editor.connection)
+            % schema_editor.quote_name(self.table_name),
+            type(self),
+            self.table_name,
+        )
+        if store:
+            store_fingerprint(schema_editor, self.table_name, None)
+
+    def create_view(self, schema_editor: DatabaseSchemaEditor):
+        if self.is_deployed(schema_editor):
+            return
+        if not (
+            self.can_replace_view(schema_editor) and self.replace_view(schema_editor)
+        ):
+            # fingerprint of the created view is stored below.
+            self.drop_view(schema_editor, store=False)
+            execute_view_ddl(
+                schema_editor,
+                self.get_create_command_template(schema_editor.connection)
+                % (schema_editor.quote_name(self.table_name), self.view_definition),
+                type(self),
+                self.table_name,
+            )
+            self.create_indexes(schema_editor)
+        store_fingerprint(schema_editor, self.table_name, self.get_fingerprint())
+
+    def is_deployed(self, schema_editor: DatabaseSchemaEditor) -> bool:
+        """
+        Same definition was deployed by view migrations (fingerprints table) and the view still exists,
+        e.g. migrations were faked back or rolled back and forward again. Skips DROP/CREATE,
+        so materialized view is not populated again.
+        """
+        connection = schema_editor.connection
+        if schema_editor.collect_sql or not is_fingerprint_tracking_enabled():
+            return False
+        if get_fingerprint(connection, self.table_name) != self.get_fingerprint():
+            return False
+        with connection.cursor() as cursor:
+            return self.is_relation_existing(cursor, connection)
+
+    def is_relation_existing(self, cursor, connection) -> bool:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT to_regclass(%s) IS NOT NULL",
+                [connection.ops.quote_name(self.table_name)],
+            )
+            return cursor.fetchone()[0]
+        return self.table_name in connection.introspection.table_names(
+            cursor, include_views=True
+        )
+
+    def can_replace_view(self, schema_editor: DatabaseSchemaEditor) -> bool:
+        """
+        Replace keeps grants and views that depend on this view.
+        Postgres allows it only when the view keeps its columns (names and types in the same order),
+        new columns can be appended. Mysql allows any change.
+        """
+        connection = schema_editor.connection
+        if (
+            self.REPLACE_COMMAND_TEMPLATE is None
+            or schema_editor.collect_sql
+            or connection.vendor not in self.REPLACE_SUPPORTED_VENDORS
+        ):
+            return False
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    if not self.is_view_existing(cursor, connection):
+                        return False
+                    if connection.vendor == "mysql":
+                        return True
+                    current_columns = self.get_columns(
+                        cursor,
+                        "SELECT * FROM %s" % connection.ops.quote_name(self.table_name),
+                    )
+                    new_columns = self.get_columns(cursor, self.view_definition)
+        except DatabaseError:  # e.g. definition uses not existing tables.
+            return False
+        return new_columns[: len(current_columns)] == current_columns
+
+    def is_view_existing(self, cursor, connection) -> bool:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(self.table_name)],
+            )
+        else:
+            cursor.execute(
+                "SELECT table_type FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [self.table_name],
+            )
+        row = cursor.fetchone()
+        return row is not None and row[0] in ("v", "VIEW")
+
+    @staticmethod
+    def get_columns(cursor, sql: str) -> list:
+        cursor.execute("SELECT * FROM (%s) AS view_columns LIMIT 0" % sql)
+        return [(column[0], column[1]) for column in cursor.description]
+
+    def replace_view(self, schema_editor: DatabaseSchemaEditor) -> bool:
+        connection = schema_editor.connection
+        sql = self.REPLACE_COMMAND_TEMPLATE % (
+            schema_editor.quote_name(self.table_name),
+            self.view_definition,
+        )
+        if not connection.features.can_rollback_ddl:
+            execute_view_ddl(schema_editor, sql, type(self), self.table_name)
+            return True
+        # column types can differ in details (like varchar length), fallback to drop and create.
+        try:
+            with transaction.atomic(using=connection.alias):
+                execute_view_ddl(schema_editor, sql, type(self), self.table_name)
+        except DatabaseError:
+            return False
+        return True
 
 
 class ForwardViewMigrationBase(ViewMigration):
     def __call__(self, apps: StateApps, schema_editor: DatabaseSchemaEditor):
         if self.view_definition:
-            if (
-                self.view_engine is None
-                or self.view_engine == schema_editor.connection.settings_dict["ENGINE"]
-            ):
-                schema_editor.execute(
-                    self.DROP_COMMAND_TEMPLATE
-                    % schema_editor.quote_name(self.table_name)
-                )
-                schema_editor.execute(
-                    self.CREATE_COMMAND_TEMPLATE
-                    % (schema_editor.quote_name(self.table_name), self.view_definition)
-                )
+            if self.is_engine_matching(schema_editor):
+                self.create_view(schema_editor)
 
 
 class BackwardViewMigrationBase(ViewMigration):
     def __call__(self, apps: StateApps, schema_editor: DatabaseSchemaEditor):
-        if (
-            self.view_engine is None
-            or self.view_engine == schema_editor.connection.settings_dict["ENGINE"]
-        ):
-            schema_editor.execute(
-                self.DROP_COMMAND_TEMPLATE % schema_editor.quote_name(self.table_name)
-            )
-        if self.view_definition:
-            if (
-                self.view_engine is None
-                or self.view_engine == schema_editor.connection.settings_dict["ENGINE"]
-            ):
-                schema_editor.execute(
-                    self.CREATE_COMMAND_TEMPLATE
-                    % (schema_editor.quote_name(self.table_name), self.view_definition)
-                )
+        if self.is_engine_matching(schema_editor):
+            if self.view_definition:
+                self.create_view(schema_editor)
+            else:
+                self.drop_view(schema_editor)
 
 
 @deconstructible
 class ForwardViewMigration(ForwardViewMigrationBase):
     DROP_COMMAND_TEMPLATE = "DROP VIEW IF EXISTS %s;"
     CREATE_COMMAND_TEMPLATE = "CREATE VIEW %s as %s;"
+    REPLACE_COMMAND_TEMPLATE = "CREATE OR REPLACE VIEW %s as %s;"
 
 
 @deconstructible
 class BackwardViewMigration(BackwardViewMigrationBase):
     DROP_COMMAND_TEMPLATE = "DROP VIEW IF EXISTS %s;"
     CREATE_COMMAND_TEMPLATE = "CREATE VIEW %s as %s;"
+    REPLACE_COMMAND_TEMPLATE = "CREATE OR REPLACE VIEW %s as %s;"
+
+
+class MaterializedViewMigrationMixin(object):
+    """Engines without materialized views (sqlite, mysql) materialize the view into a table."""
+
+    TABLE_DROP_COMMAND_TEMPLATE = "DROP TABLE IF EXISTS %s;"
+    TABLE_CREATE_COMMAND_TEMPLATE = "CREATE TABLE %s AS %s;"
+
+    def get_drop_command_template(self, connection) -> str:
+        if is_materialized_view_emulated(connection):
+            return self.TABLE_DROP_COMMAND_TEMPLATE
+        return self.DROP_COMMAND_TEMPLATE
+
+    def get_create_command_template(self, connection) -> str:
+        if is_materialized_view_emulated(connection):
+            return self.TABLE_CREATE_COMMAND_TEMPLATE
+        return self.CREATE_COMMAND_TEMPLATE
 
 
 @deconstructible
-class ForwardMaterializedViewMigration(ForwardViewMigrationBase):
+class ForwardMaterializedViewMigration(
+    MaterializedViewMigrationMixin, ForwardViewMigrationBase
+):
     DROP_COMMAND_TEMPLATE = "DROP MATERIALIZED VIEW IF EXISTS %s;"
     CREATE_COMMAND_TEMPLATE = "CREATE MATERIALIZED VIEW %s as %s;"
+    CREATE_NO_DATA_COMMAND_TEMPLATE = "CREATE MATERIALIZED VIEW %s as %s WITH NO DATA;"
+
+    def __init__(
+        self,
+        view_definition: str,
+        table_name: str,
+        engine=None,
+        indexes=None,
+        with_data=True,
+    ):
+        super().__init__(view_definition, table_name, engine=engine, indexes=indexes)
+        # view created WITH NO DATA is populated later, e.g. by refreshviews --unpopulated.
+        self.with_data = with_data
+
+    def get_create_command_template(self, connection) -> str:
+        # tables (sqlite, mysql) are always built with data.
+        if not self.with_data and not is_materialized_view_emulated(connection):
+            return self.CREATE_NO_DATA_COMMAND_TEMPLATE
+        return super().get_create_command_template(connection)
 
 
 @deconstructible
-class BackwardMaterializedViewMigration(BackwardViewMigrationBase):
+class BackwardMaterializedViewMigration(
+    MaterializedViewMigrationMixin, BackwardViewMigrationBase
+):
     DROP_COMMAND_TEMPLATE = "DROP MATERIALIZED VIEW IF EXISTS %s;"
     CREATE_COMMAND_TEMPLATE = "CREATE MATERIALIZED VIEW %s as %s;"
 
@@ -93,16 +327,74 @@ class DropViewMigration(object):
             self.view_engine is None
             or self.view_engine == schema_editor.connection.settings_dict["ENGINE"]
         ):
-            schema_editor.execute(
-                self.DROP_COMMAND_TEMPLATE % schema_editor.quote_name(self.table_name)
+            execute_view_ddl(
+                schema_editor,
+                self.get_drop_command_template(schema_editor.connection)
+                % schema_editor.quote_name(self.table_name),
+                type(self),
+                self.table_name,
             )
+            store_fingerprint(schema_editor, self.table_name, None)
+
+    def get_drop_command_template(self, connection) -> str:
+        return self.DROP_COMMAND_TEMPLATE
 
 
 @deconstructible
-class DropMaterializedView(DropViewMigration):
+class DropMaterializedView(MaterializedViewMigrationMixin, DropViewMigration):
     DROP_COMMAND_TEMPLATE = "DROP MATERIALIZED VIEW IF EXISTS %s;"
 
 
 @deconstructible
 class DropView(DropViewMigration):
     DROP_COMMAND_TEMPLATE = "DROP VIEW IF EXISTS %s;"
+
+
+@deconstructible
+class ViewIndexesMigration(object):
+    """Removes and adds indexes of a materialized view, when view itself is not changed."""
+
+    DROP_INDEX_COMMAND_TEMPLATE = "DROP INDEX IF EXISTS %s;"
+    MYSQL_DROP_INDEX_COMMAND_TEMPLATE = "DROP INDEX %s ON %s;"
+
+    def __init__(
+        self, table_name: str, add_indexes=None, remove_indexes=None, engine=None
+    ):
+        self.table_name = table_name
+        self.add_indexes = add_indexes or {}
+        self.remove_indexes = remove_indexes or []
+        self.view_engine = engine
+
+    def get_drop_index_sql(self, schema_editor: DatabaseSchemaEditor, index_name: str):
+        if schema_editor.connection.vendor == "mysql":
+            # table backed materialized view, mysql index belongs to the table.
+            return self.MYSQL_DROP_INDEX_COMMAND_TEMPLATE % (
+                schema_editor.quote_name(index_name),
+                schema_editor.quote_name(self.table_name),
+            )
+        return self.DROP_INDEX_COMMAND_TEMPLATE % schema_editor.quote_name(
+            self.get_index_name(index_name)
+        )
+
+    def get_index_name(self, index_name: str) -> str:
+        # indexes are created in view schema.
+        if '"."' in self.table_name:
+            return '%s"."%s' % (self.table_name.split('"."')[0], index_name)
+        return index_name
+
+    def __call__(self, apps: StateApps, schema_editor: DatabaseSchemaEditor):
+        if (
+            self.view_engine is None
+            or self.view_engine == schema_editor.connection.settings_dict["ENGINE"]
+        ):
+            for index_name in self.remove_indexes:
+                execute_view_ddl(
+                    schema_editor,
+                    self.get_drop_index_sql(schema_editor, index_name),
+                    type(self),
+                    self.table_name,
+                )
+            for index_sql in self.add_indexes.values():
+                execute_view_ddl(schema_editor, index_sql, type(self), self.table_name)
+            # fingerprint covers indexes, view will be recreated next time.
+            store_fingerprint(schema_editor, self.table_name, None)
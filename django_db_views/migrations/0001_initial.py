@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedViewRefresh',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=255)),
+                ('using', models.CharField(max_length=255)),
+                ('strategy', models.CharField(max_length=32)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+                ('duration', models.FloatField(help_text='seconds')),
+                ('row_count', models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'django_db_views_refresh',
+                'indexes': [models.Index(fields=['view_name', 'using', '-finished_at'], name='django_db_views_refresh_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class MaterializedViewRefresh(models.Model):
+    """
+    Bookkeeping of materialized view refreshes (see DBMaterializedView.refresh).
+    Record is stored at the database where the view was refreshed.
+    """
+
+    view_name = models.CharField(max_length=255)
+    using = models.CharField(max_length=255)
+    strategy = models.CharField(max_length=32)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    duration = models.FloatField(help_text="seconds")
+    row_count = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        db_table = "django_db_views_refresh"
+        indexes = [
+            models.Index(
+                fields=["view_name", "using", "-finished_at"],
+                name="django_db_views_refresh_idx",
+            )
+        ]
+
+    def __str__(self):
+        return "%s refreshed at %s" % (self.view_name, self.finished_at)
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import sqlparse
+from django.conf import settings
+
+
+def sql_normalize(sql: str) -> str:
+    return sqlparse.format(
+        sql,
+        compact=True,
+        keyword_case="upper",
+        identifier_case="lower",
+        reindent=True,
+        strip_comments=True,
+    ).strip()
+
+
+class SQLNormalizationCache(object):
+    """
+    Memoize sqlparse normalization, keyed by a content hash of the raw sql.
+    When path is provided entries are persisted between runs (json file),
+    least recently used entries are evicted above max_entries.
+    Persisted entries are dropped when sqlparse version changes, cus it may format sql differently.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.is_loaded = False
+        self.is_dirty = False
+
+    @staticmethod
+    def get_key(sql: str) -> str:
+        return hashlib.sha256(sql.encode("utf-8")).hexdigest()
+
+    def normalize(self, sql: str) -> str:
+        if not self.is_loaded:
+            self.load()
+        key = self.get_key(sql)
+        normalized = self.entries.pop(key, None)
+        if normalized is None:
+            normalized = sql_normalize(sql)
+            self.is_dirty = True
+        # (re)insert as most recently used.
+        self.entries[key] = normalized
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return normalized
+
+    def load(self) -> None:
+        self.is_loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                content = json.load(cache_file)
+        except (OSError, ValueError):  # broken cache file, we will rebuild it.
+            return
+        if content.get("sqlparse") == sqlparse.__version__:
+            self.entries.update(content.get("entries", {}))
+
+    def save(self) -> None:
+        if not self.path or not self.is_dirty:
+            return
+        content = {"sqlparse": sqlparse.__version__, "entries": self.entries}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = "%s.tmp" % self.path
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(content, cache_file)
+        os.replace(tmp_path, self.path)
+        self.is_dirty = False
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.is_dirty = True
+
+
+_sql_normalization_cache = None
+
+
+def get_sql_normalization_cache() -> SQLNormalizationCache:
+    """
+    Settings:
+        DB_VIEWS_SQL_NORMALIZATION_CACHE_PATH - enables on-disk cache (disabled by default).
+        DB_VIEWS_SQL_NORMALIZATION_CACHE_MAX_ENTRIES - default 1000.
+    """
+    global _sql_normalization_cache
+    if _sql_normalization_cache is None:
+        _sql_normalization_cache = SQLNormalizationCache(
+            path=getattr(settings, "DB_VIEWS_SQL_NORMALIZATION_CACHE_PATH", None),
+            max_entries=getattr(
+                settings, "DB_VIEWS_SQL_NORMALIZATION_CACHE_MAX_ENTRIES", 1000
+            ),
+        )
+    return _sql_normalization_cache
@@ -22,6 +22,7 @@ class DBViewModelState(ModelState):
         view_definition: str = None,
         table_name: str = None,
         base_class=None,
+        view_indexes: dict = None,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
@@ -30,6 +31,7 @@ class DBViewModelState(ModelState):
             self.view_definition = view_definition
             self.base_class = base_class
             self.table_name = table_name
+            self.view_indexes = view_indexes or {}
 
 
 class ViewRunPython(operations.RunPython):
@@ -60,6 +62,7 @@ class ViewRunPython(operations.RunPython):
                     view_definition=self.code.view_definition,
                     base_class=model,
                     table_name=self.code.table_name,
+                    view_indexes=self.code.indexes,
                 )
             )
 
@@ -74,3 +77,26 @@ class ViewDropRunPython(operations.RunPython):
                 app_label,
                 get_table_engine_name_hash(self.code.table_name, self.code.view_engine),
             )
+
+
+class ViewIndexRunPython(operations.RunPython):
+    reduces_to_sql = True
+
+    def state_forwards(self, app_label, state):
+        if VIEW_MIGRATION_CONTEXT["is_view_migration"]:
+            key = (
+                app_label,
+                get_table_engine_name_hash(self.code.table_name, self.code.view_engine),
+            )
+            if key in state.models:
+                model_state = state.models[key]
+                view_indexes = {
+                    index_name: index_sql
+                    for index_name, index_sql in model_state.view_indexes.items()
+                    if index_name not in self.code.remove_indexes
+                }
+                view_indexes.update(self.code.add_indexes)
+                model_state.view_indexes = view_indexes
+
+    def describe(self):
+        return "View indexes migration operation"
@@ -0,0 +1,187 @@
+import hashlib
+import time
+import warnings
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models
+
+VERSION_KEY_PREFIX = "django_db_views:version"
+QUERY_KEY_PREFIX = "django_db_views:query"
+
+# view model -> {engine: materialized views whose data the view reads}
+_versioned_views_cache = weakref.WeakKeyDictionary()
+
+
+def get_queryset_cache():
+    """
+    Settings:
+        DB_VIEWS_QUERYSET_CACHE - cache alias used by CachedViewQuerySet ("default" by default),
+            should be shared between processes, so refresh from any process invalidates results.
+    """
+    return caches[getattr(settings, "DB_VIEWS_QUERYSET_CACHE", DEFAULT_CACHE_ALIAS)]
+
+
+def get_version_key(view_model, using: str) -> str:
+    return "%s:%s:%s" % (VERSION_KEY_PREFIX, using, view_model._meta.db_table)
+
+
+def get_view_versions(view_models, using: str) -> list:
+    """
+    Versions of the views at the database, missing versions (never bumped or evicted)
+    are initialized with current time, so results cached with an evicted version are not reused.
+    """
+    cache = get_queryset_cache()
+    keys = [get_version_key(view_model, using) for view_model in view_models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_view_version(view_model, using: str) -> None:
+    """Invalidates cached results of the view (and of regular views that read it) at the database."""
+    cache = get_queryset_cache()
+    key = get_version_key(view_model, using)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:  # missing key
+            cache.set(key, time.time_ns(), timeout=None)
+    except Exception as e:
+        # data is already refreshed, we only warn.
+        warnings.warn(
+            "Cached results of %s were not invalidated (%s)"
+            % (view_model._meta.db_table, e)
+        )
+
+
+def get_versioned_views(view_model, engine: str) -> list:
+    """
+    The view and materialized views it reads from (through regular views),
+    their refreshes change results of the view.
+    """
+    from django_db_views.db_view import DBMaterializedView
+    from django_db_views.dependency_graph import ViewDependencyGraph
+
+    engines = _versioned_views_cache.setdefault(view_model, {})
+    if engine not in engines:
+        graph = ViewDependencyGraph(engine, view_models=())
+        versioned_views = [view_model]
+        visited = {view_model}
+        to_visit = [] if issubclass(view_model, DBMaterializedView) else [view_model]
+        while to_visit:
+            current = to_visit.pop()
+            for dependency in graph.get_inferred_dependencies(
+                current
+            ) | graph.get_declared_dependencies(current):
+                if dependency in visited or not graph.is_view(dependency):
+                    continue
+                visited.add(dependency)
+                if issubclass(dependency, DBMaterializedView):
+                    # data of materialized view changes only on its own refresh.
+                    versioned_views.append(dependency)
+                else:
+                    to_visit.append(dependency)
+        engines[engine] = sorted(versioned_views, key=lambda view: view._meta.db_table)
+    return engines[engine]
+
+
+class CachedViewQuerySet(models.QuerySet):
+    """
+    Read-through cache of view query results (Django cache framework, see get_queryset_cache).
+    Cache key is built from the compiled query and versions of the view
+    and of materialized views it reads from, DBMaterializedView.refresh bumps the version.
+    Regular views are not refreshed, their results are cached for the timeout only.
+    Usage:
+        objects = CachedViewQuerySet.as_manager()
+        SomeView.objects.filter(...).cache(timeout=600)  # DEFAULT_TIMEOUT of the cache by default
+        SomeView.objects.uncached()
+    Cached: evaluated querysets (list, iteration, values(), ...), count() and aggregate().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_enabled = True
+        self._cache_timeout = DEFAULT_TIMEOUT
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_enabled = self._cache_enabled
+        clone._cache_timeout = self._cache_timeout
+        return clone
+
+    def cache(self, timeout=DEFAULT_TIMEOUT):
+        clone = self._chain()
+        clone._cache_enabled = True
+        clone._cache_timeout = timeout
+        return clone
+
+    def uncached(self):
+        clone = self._chain()
+        clone._cache_enabled = False
+        return clone
+
+    def get_cache_key(self, *extra):
+        """Returns None when the query is not cacheable."""
+        if not self._cache_enabled or self.query.select_for_update:
+            return None
+        try:
+            sql, params = self.query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+        engine = connections[self.db].settings_dict["ENGINE"]
+        versions = get_view_versions(get_versioned_views(self.model, engine), self.db)
+        content = repr(
+            (
+                self.db,
+                sql,
+                params,
+                self._iterable_class.__name__,
+                self._fields,
+                versions,
+                extra,
+            )
+        )
+        return "%s:%s:%s" % (
+            QUERY_KEY_PREFIX,
+            self.model._meta.db_table,
+            hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        )
+
+    def _get_cached(self, key, get_result):
+        if key is None:
+            return get_result()
+        cache = get_queryset_cache()
+        # results are wrapped, so cached None or empty list is a hit.
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0]
+        result = get_result()
+        cache.set(key, (result,), timeout=self._cache_timeout)
+        return result
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._result_cache = self._get_cached(
+                self.get_cache_key(),
+                lambda: list(self._iterable_class(self)),
+            )
+        if self._prefetch_related_lookups and not self._prefetch_done:
+            self._prefetch_related_objects()
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return self._get_cached(self.get_cache_key("count"), super().count)
+
+    def aggregate(self, *args, **kwargs):
+        return self._get_cached(
+            self.get_cache_key("aggregate", repr(args), repr(sorted(kwargs.items()))),
+            lambda: super(CachedViewQuerySet, self).aggregate(*args, **kwargs),
+        )
@@ -0,0 +1,240 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import NamedTuple, Optional, Type, Callable
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from django_db_views.db_view import DBMaterializedView, DBViewsRegistry
+from django_db_views.dependency_graph import ViewDependencyGraph
+from django_db_views.refresh_strategies import get_unpopulated_materialized_views
+
+
+class RefreshResult(NamedTuple):
+    view_model: Type[DBMaterializedView]
+    using: str
+    duration: Optional[float] = None
+    exception: Optional[BaseException] = None
+    skipped: bool = False
+    # not refreshed, other refresh of the view was running (lock=skip).
+    busy: bool = False
+
+
+def get_materialized_views(using: Optional[str] = None) -> list:
+    """Registered materialized views, only views defined for the engine of the database when using is given."""
+    view_models = DBViewsRegistry.get_by_base_class(DBMaterializedView)
+    if using is None:
+        return view_models
+    database_views = set(DBViewsRegistry.get_by_database(using))
+    return [view_model for view_model in view_models if view_model in database_views]
+
+
+def get_unpopulated_views(view_models=None, using: str = None) -> list:
+    """Materialized views (all defined for the database by default) created WITH NO DATA and not populated yet."""
+    using = using or DEFAULT_DB_ALIAS
+    if view_models is None:
+        view_models = get_materialized_views(using)
+    connection = connections[using]
+    unpopulated = set(
+        get_unpopulated_materialized_views(
+            connection, [view_model._meta.db_table for view_model in view_models]
+        )
+    )
+    return [
+        view_model
+        for view_model in view_models
+        if view_model._meta.db_table in unpopulated
+    ]
+
+
+def get_refresh_batches(view_models=None, using: str = None) -> list:
+    """
+    Groups view models (all defined for the database by default) into batches, views in a batch depend only on views from previous batches,
+    so they can be refreshed at the same time.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    if view_models is None:
+        view_models = get_materialized_views(using)
+    graph = ViewDependencyGraph(engine=connections[using].settings_dict["ENGINE"])
+    return graph.get_batches(view_models)
+
+
+def _refresh_view(view_model, using: str, **refresh_kwargs) -> Optional[float]:
+    # Runs in a worker thread, django gives each thread its own connection.
+    try:
+        start = time.monotonic()
+        if not view_model.refresh(using=using, **refresh_kwargs):
+            return None  # other refresh is running (lock=skip)
+        return time.monotonic() - start
+    finally:
+        connections[using].close()
+
+
+def get_pending_refreshes(view_models, using: str) -> dict:
+    """Maps view models (all defined for the database by default) to views from the list they depend on."""
+    if view_models is None:
+        view_models = get_materialized_views(using)
+    graph = ViewDependencyGraph(engine=connections[using].settings_dict["ENGINE"])
+    pending = graph.get_dependencies_between(view_models)
+    # detect cycles before starting any refresh.
+    graph.get_batches(view_models)
+    return pending
+
+
+def _get_add_result(results: list, callback=None):
+    if callback is None:
+        return results.append
+
+    def add_result(result):
+        results.append(result)
+        callback(result)
+
+    return add_result
+
+
+def _pop_ready_views(pending: dict, done: set, failed: set, using: str, add_result):
+    """Pops views whose dependencies are refreshed, views that depend on failed views are skipped."""
+    ready = []
+    for view_model, dependencies in sorted(
+        pending.items(), key=lambda item: item[0]._meta.db_table
+    ):
+        if dependencies & failed:
+            del pending[view_model]
+            failed.add(view_model)
+            add_result(RefreshResult(view_model, using, skipped=True))
+        elif dependencies <= done:
+            del pending[view_model]
+            ready.append(view_model)
+    return ready
+
+
+def _add_refresh_result(view_model, using: str, future, done, failed, add_result):
+    exception = future.exception()
+    if exception is None:
+        done.add(view_model)
+        duration = future.result()
+        add_result(
+            RefreshResult(view_model, using, duration=duration, busy=duration is None)
+        )
+    else:
+        failed.add(view_model)
+        add_result(RefreshResult(view_model, using, exception=exception))
+
+
+def _raise_first_exception(results: list) -> None:
+    for result in results:
+        if result.exception is not None:
+            raise result.exception
+
+
+def refresh_all(
+    view_models=None,
+    using: str = None,
+    workers: int = 4,
+    fail_silently: bool = False,
+    callback: Optional[Callable[[RefreshResult], None]] = None,
+    **refresh_kwargs,
+) -> list:
+    """
+    Refreshes materialized views (all defined for the database by default) in dependency order,
+    dependencies are inferred from view definitions (see ViewDependencyGraph).
+    Independent views are refreshed at the same time on separate connections, up to `workers` at once.
+    Views that depend on a failed view are skipped.
+    Worker connections do not see changes that are not committed yet by the calling thread.
+    Extra kwargs (like concurrently) are passed to DBMaterializedView.refresh.
+    callback is called (in the calling thread) with each RefreshResult as soon as it is known.
+    Returns RefreshResult per view, in the order refreshes finished.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    pending = get_pending_refreshes(view_models, using)
+    results = []
+    add_result = _get_add_result(results, callback)
+    done = set()
+    failed = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for view_model in _pop_ready_views(
+                pending, done, failed, using, add_result
+            ):
+                future = executor.submit(
+                    _refresh_view, view_model, using, **refresh_kwargs
+                )
+                running[future] = view_model
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                view_model = running.pop(future)
+                _add_refresh_result(view_model, using, future, done, failed, add_result)
+
+    if not fail_silently:
+        _raise_first_exception(results)
+    return results
+
+
+async def arefresh_view(
+    view_model, using: str = None, **refresh_kwargs
+) -> Optional[float]:
+    """
+    Refreshes the view on a separate thread and connection, so the event loop is not blocked
+    and other refreshes can run at the same time. Returns refresh duration, None when refresh was skipped.
+    """
+    # asgiref is installed with django 3.0+, module stays importable on older versions.
+    from asgiref.sync import sync_to_async
+
+    return await sync_to_async(_refresh_view, thread_sensitive=False)(
+        view_model, using or DEFAULT_DB_ALIAS, **refresh_kwargs
+    )
+
+
+async def arefresh_all(
+    view_models=None,
+    using: str = None,
+    concurrency: int = 4,
+    fail_silently: bool = False,
+    callback: Optional[Callable[[RefreshResult], None]] = None,
+    **refresh_kwargs,
+) -> list:
+    """
+    Async refresh_all, refreshes up to `concurrency` views at once (each on its own thread and connection),
+    in dependency order. callback is called in the event loop.
+    """
+    from asgiref.sync import sync_to_async
+
+    using = using or DEFAULT_DB_ALIAS
+    # view definitions (callables) may use the database.
+    pending = await sync_to_async(get_pending_refreshes)(view_models, using)
+    results = []
+    add_result = _get_add_result(results, callback)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def refresh(view_model):
+        async with semaphore:
+            return await arefresh_view(view_model, using, **refresh_kwargs)
+
+    done = set()
+    failed = set()
+    running = {}
+    try:
+        while pending or running:
+            for view_model in _pop_ready_views(
+                pending, done, failed, using, add_result
+            ):
+                running[asyncio.ensure_future(refresh(view_model))] = view_model
+            if not running:
+                continue
+            finished, _ = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in finished:
+                view_model = running.pop(task)
+                _add_refresh_result(view_model, using, task, done, failed, add_result)
+    finally:
+        # cancelled, started refreshes are not waited for.
+        for task in running:
+            task.cancel()
+
+    if not fail_silently:
+        _raise_first_exception(results)
+    return results
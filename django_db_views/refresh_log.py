@@ -0,0 +1,89 @@
+import warnings
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections, transaction, DatabaseError
+
+
+def is_refresh_log_enabled() -> bool:
+    return getattr(settings, "DB_VIEWS_REFRESH_LOG", True)
+
+
+def count_rows(connection, table_name: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM %s;" % connection.ops.quote_name(table_name)
+        )
+        return cursor.fetchone()[0]
+
+
+def record_refresh(
+    table_name: str,
+    using: str,
+    strategy: str,
+    started_at: datetime,
+    finished_at: datetime,
+    duration: float,
+):
+    """
+    Stores refresh at MaterializedViewRefresh table of the database where view was refreshed.
+    Refresh already happened, so when the table is missing (django_db_views migrations are not applied)
+    we only warn.
+    Settings:
+        DB_VIEWS_REFRESH_LOG - disables bookkeeping when False (enabled by default).
+        DB_VIEWS_REFRESH_LOG_ROW_COUNT - counts view rows after refresh when True (disabled by default,
+            COUNT(*) scans the whole view).
+    """
+    from django_db_views.models import MaterializedViewRefresh
+
+    if not is_refresh_log_enabled():
+        return None
+    try:
+        with transaction.atomic(using=using):
+            row_count = None
+            if getattr(settings, "DB_VIEWS_REFRESH_LOG_ROW_COUNT", False):
+                row_count = count_rows(connections[using], table_name)
+            return MaterializedViewRefresh.objects.using(using).create(
+                view_name=table_name,
+                using=using,
+                strategy=strategy,
+                started_at=started_at,
+                finished_at=finished_at,
+                duration=duration,
+                row_count=row_count,
+            )
+    except DatabaseError as e:
+        warnings.warn(
+            "Refresh of %s was not recorded, "
+            "are django_db_views migrations applied? (%s)" % (table_name, e)
+        )
+        return None
+
+
+def get_last_refresh(table_name: str, using: str):
+    """
+    Returns the last recorded refresh of the view, None when there is none.
+    Missing table (django_db_views migrations are not applied) is treated as no refreshes, we only warn.
+    """
+    from django_db_views.models import MaterializedViewRefresh
+
+    try:
+        with transaction.atomic(using=using):
+            return (
+                MaterializedViewRefresh.objects.using(using)
+                .filter(view_name=table_name, using=using)
+                .order_by("-finished_at")
+                .first()
+            )
+    except DatabaseError as e:
+        warnings.warn(
+            "Refreshes of %s can not be read, "
+            "are django_db_views migrations applied? (%s)" % (table_name, e)
+        )
+        return None
+
+
+def get_last_refreshed(table_name: str, using: str) -> Optional[datetime]:
+    last_refresh = get_last_refresh(table_name, using)
+    return last_refresh.finished_at if last_refresh is not None else None
@@ -0,0 +1,344 @@
+import hashlib
+import re
+from contextlib import contextmanager
+from typing import Optional
+
+from django.db import transaction, NotSupportedError, DatabaseError
+from django.db.backends.utils import truncate_name
+
+REFRESH = "refresh"
+CONCURRENTLY = "concurrently"
+SWAP = "swap"
+
+# vendors with native materialized views, others materialize views into tables.
+MATERIALIZED_VIEW_VENDORS = ("postgresql",)
+
+# refresh lock modes
+LOCK_WAIT = "wait"
+LOCK_SKIP = "skip"
+
+INDEX_DEFINITION_REGEX = re.compile(
+    r'^(?P<create>CREATE (?:UNIQUE )?INDEX) (?P<name>"(?:[^"]|"")*"|\S+) '
+    r'ON (?P<only>ONLY )?(?P<table>(?:"(?:[^"]|"")*"|[^\s"])+) (?P<rest>USING .*)$',
+    re.DOTALL,
+)
+
+
+@contextmanager
+def statement_timeout(connection, timeout: Optional[float]):
+    """
+    Limits time of each statement (seconds), for the session cus refresh strategies manage own transactions.
+    Works only with postgres.
+    """
+    with _session_timeout(connection, "statement_timeout", timeout):
+        yield
+
+
+@contextmanager
+def lock_timeout(connection, timeout: Optional[float]):
+    """Limits time (seconds) of waiting for each lock, refresh lock included. Works only with postgres."""
+    with _session_timeout(connection, "lock_timeout", timeout):
+        yield
+
+
+@contextmanager
+def _session_timeout(connection, setting: str, timeout: Optional[float]):
+    if timeout is None:
+        yield
+        return
+    if connection.vendor != "postgresql":
+        raise NotSupportedError("%s is supported only by postgres." % setting)
+    with connection.cursor() as cursor:
+        cursor.execute("SET %s = %%s;" % setting, [int(timeout * 1000)])
+    try:
+        yield
+    finally:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("RESET %s;" % setting)
+        except DatabaseError:
+            # aborted transaction, SET is rolled back with it.
+            pass
+
+
+def get_refresh_lock_key(table_name: str) -> int:
+    """Advisory lock key (signed bigint) of the view refresh, the same in every process."""
+    digest = hashlib.sha256(
+        ("django_db_views:refresh:%s" % table_name).encode("utf-8")
+    ).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+@contextmanager
+def refresh_lock(connection, table_name: str, mode: Optional[str]):
+    """
+    Cluster wide lock of the view refresh, postgres session advisory lock
+    (session level cus refresh strategies manage own transactions).
+    mode:
+        wait - waits for the lock (limited by lock_timeout).
+        skip - yields False when other session holds the lock.
+        None - no lock.
+    Advisory locks are reentrant, so the same session can lock the view again.
+    """
+    if mode is None:
+        yield True
+        return
+    if mode not in (LOCK_WAIT, LOCK_SKIP):
+        raise ValueError("Unknown refresh lock mode: %s" % mode)
+    if connection.vendor != "postgresql":
+        raise NotSupportedError("Refresh lock is supported only by postgres.")
+    key = get_refresh_lock_key(table_name)
+    with connection.cursor() as cursor:
+        if mode == LOCK_WAIT:
+            cursor.execute("SELECT pg_advisory_lock(%s);", [key])
+            acquired = True
+        else:
+            cursor.execute("SELECT pg_try_advisory_lock(%s);", [key])
+            acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s);", [key])
+            except DatabaseError:
+                # aborted transaction of the caller, lock stays until the connection is closed.
+                pass
+
+
+def is_materialized_view_emulated(connection) -> bool:
+    return connection.vendor not in MATERIALIZED_VIEW_VENDORS
+
+
+def get_unpopulated_materialized_views(connection, table_names) -> list:
+    """
+    Materialized views created WITH NO DATA and not refreshed yet, checked with one catalog query.
+    Table backed materialized views (sqlite, mysql) are always populated.
+    """
+    if is_materialized_view_emulated(connection) or not table_names:
+        return []
+    quoted_names = {
+        connection.ops.quote_name(table_name): table_name for table_name in table_names
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT t.name
+            FROM unnest(%s::text[]) AS t(name)
+                JOIN pg_class c ON c.oid = to_regclass(t.name)
+            WHERE c.relkind = 'm' AND NOT c.relispopulated
+            """,
+            [list(quoted_names)],
+        )
+        unpopulated = {quoted_names[name] for (name,) in cursor.fetchall()}
+    return [table_name for table_name in table_names if table_name in unpopulated]
+
+
+def refresh_materialized_view(connection, table_name: str, concurrently=False):
+    with connection.cursor() as cursor:
+        if concurrently:
+            cursor.execute(
+                "REFRESH MATERIALIZED VIEW CONCURRENTLY %s;"
+                % connection.ops.quote_name(table_name)
+            )
+        else:
+            cursor.execute(
+                "REFRESH MATERIALIZED VIEW %s;" % connection.ops.quote_name(table_name)
+            )
+
+
+def get_swap_name(connection, name: str, suffix: str) -> str:
+    return truncate_name(
+        "%s_%s" % (name, suffix), connection.ops.max_name_length()
+    ).strip('"')
+
+
+def rewrite_index_definition(index_definition: str, name: str, table: str) -> str:
+    """Changes index name and indexed table of pg_get_indexdef output."""
+    match = INDEX_DEFINITION_REGEX.match(index_definition)
+    if match is None:
+        raise ValueError("Unsupported index definition: %s" % index_definition)
+    return "%s %s ON %s%s %s" % (
+        match.group("create"),
+        name,
+        match.group("only") or "",
+        table,
+        match.group("rest"),
+    )
+
+
+def swap_materialized_view(connection, table_name: str):
+    """
+    Builds a shadow materialized view from the deployed definition, creates the view indexes on it,
+    then swaps it in with renames in a short transaction, so readers are blocked only for the renames.
+    Old view is dropped after the swap.
+    Works only with postgres. Views that depend on the materialized view would follow the old one,
+    so such materialized views can't be swapped.
+    Grants and comments of the view are not copied.
+    """
+    if connection.vendor != "postgresql":
+        raise NotSupportedError("Swap refresh strategy is supported only by postgres.")
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.oid, n.nspname, c.relname, pg_get_viewdef(c.oid)
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.oid = to_regclass(%s) AND c.relkind = 'm'
+            """,
+            [quote_name(table_name)],
+        )
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError("Materialized view %s does not exist." % table_name)
+        oid, schema, name, view_definition = row
+        cursor.execute(
+            """
+            SELECT DISTINCT dependent.relname
+            FROM pg_depend d
+                JOIN pg_rewrite r ON r.oid = d.objid
+                JOIN pg_class dependent ON dependent.oid = r.ev_class
+            WHERE d.refobjid = %s AND dependent.oid <> %s
+            """,
+            [oid, oid],
+        )
+        dependents = [dependent for (dependent,) in cursor.fetchall()]
+        if dependents:
+            raise ValueError(
+                "Materialized view %s can't be swapped, it is used by: %s"
+                % (table_name, ", ".join(dependents))
+            )
+        cursor.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s
+            ORDER BY i.relname
+            """,
+            [oid],
+        )
+        indexes = cursor.fetchall()
+
+        shadow_name = get_swap_name(connection, name, "shadow")
+        old_name = get_swap_name(connection, name, "old")
+        qualified_name = "%s.%s" % (quote_name(schema), quote_name(name))
+        qualified_shadow_name = "%s.%s" % (quote_name(schema), quote_name(shadow_name))
+        qualified_old_name = "%s.%s" % (quote_name(schema), quote_name(old_name))
+
+        cursor.execute("DROP MATERIALIZED VIEW IF EXISTS %s;" % qualified_shadow_name)
+        try:
+            cursor.execute(
+                "CREATE MATERIALIZED VIEW %s AS %s"
+                % (qualified_shadow_name, view_definition)
+            )
+            for index_name, index_definition in indexes:
+                cursor.execute(
+                    rewrite_index_definition(
+                        index_definition,
+                        quote_name(get_swap_name(connection, index_name, "shadow")),
+                        qualified_shadow_name,
+                    )
+                )
+            with transaction.atomic(using=connection.alias):
+                cursor.execute(
+                    "ALTER MATERIALIZED VIEW %s RENAME TO %s;"
+                    % (qualified_name, quote_name(old_name))
+                )
+                for index_name, _ in indexes:
+                    cursor.execute(
+                        "ALTER INDEX %s.%s RENAME TO %s;"
+                        % (
+                            quote_name(schema),
+                            quote_name(index_name),
+                            quote_name(get_swap_name(connection, index_name, "old")),
+                        )
+                    )
+                cursor.execute(
+                    "ALTER MATERIALIZED VIEW %s RENAME TO %s;"
+                    % (qualified_shadow_name, quote_name(name))
+                )
+                for index_name, _ in indexes:
+                    cursor.execute(
+                        "ALTER INDEX %s.%s RENAME TO %s;"
+                        % (
+                            quote_name(schema),
+                            quote_name(get_swap_name(connection, index_name, "shadow")),
+                            quote_name(index_name),
+                        )
+                    )
+        except Exception:
+            cursor.execute(
+                "DROP MATERIALIZED VIEW IF EXISTS %s;" % qualified_shadow_name
+            )
+            raise
+        cursor.execute("DROP MATERIALIZED VIEW IF EXISTS %s;" % qualified_old_name)
+
+
+def rebuild_materialized_table(connection, table_name: str, view_definition: str):
+    """
+    Refreshes table backed materialized view (sqlite, mysql): builds a shadow table from the view definition,
+    then swaps it in with renames, so readers see old rows until the swap. Indexes are moved to the new table.
+    Old table is dropped after the swap.
+    """
+    if not is_materialized_view_emulated(connection):
+        raise NotSupportedError(
+            "%s has materialized views, use refresh strategies." % connection.vendor
+        )
+    quote_name = connection.ops.quote_name
+    shadow_name = get_swap_name(connection, table_name, "shadow")
+    old_name = get_swap_name(connection, table_name, "old")
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS %s;" % quote_name(shadow_name))
+        try:
+            if connection.vendor == "mysql":
+                # like copies columns and indexes, rename of both tables is atomic.
+                cursor.execute(
+                    "CREATE TABLE %s LIKE %s;"
+                    % (quote_name(shadow_name), quote_name(table_name))
+                )
+                cursor.execute(
+                    "INSERT INTO %s %s;" % (quote_name(shadow_name), view_definition)
+                )
+                cursor.execute(
+                    "RENAME TABLE %s TO %s, %s TO %s;"
+                    % (
+                        quote_name(table_name),
+                        quote_name(old_name),
+                        quote_name(shadow_name),
+                        quote_name(table_name),
+                    )
+                )
+            else:
+                cursor.execute(
+                    "SELECT sql FROM sqlite_master "
+                    "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+                    [table_name],
+                )
+                indexes = [index_sql for (index_sql,) in cursor.fetchall()]
+                cursor.execute(
+                    "CREATE TABLE %s AS %s;"
+                    % (quote_name(shadow_name), view_definition)
+                )
+                # legacy rename keeps views that read the table pointing at its name.
+                cursor.execute("PRAGMA legacy_alter_table = ON;")
+                try:
+                    with transaction.atomic(using=connection.alias):
+                        cursor.execute(
+                            "ALTER TABLE %s RENAME TO %s;"
+                            % (quote_name(table_name), quote_name(old_name))
+                        )
+                        cursor.execute(
+                            "ALTER TABLE %s RENAME TO %s;"
+                            % (quote_name(shadow_name), quote_name(table_name))
+                        )
+                        # indexes are dropped with the old table and created on the new one.
+                        cursor.execute("DROP TABLE %s;" % quote_name(old_name))
+                        for index_sql in indexes:
+                            cursor.execute(index_sql)
+                finally:
+                    cursor.execute("PRAGMA legacy_alter_table = OFF;")
+        except Exception:
+            cursor.execute("DROP TABLE IF EXISTS %s;" % quote_name(shadow_name))
+            raise
+        cursor.execute("DROP TABLE IF EXISTS %s;" % quote_name(old_name))
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+# sender - view model, kwargs: using, engine, strategy
+pre_refresh = Signal()
+# sender - view model, kwargs: using, engine, strategy, sql, duration (seconds), exception (None on success)
+post_refresh = Signal()
+# sender - view migration class, kwargs: table_name, using, engine, sql
+pre_view_ddl = Signal()
+# sender - view migration class, kwargs: table_name, using, engine, sql, duration (seconds), exception (None on success)
+post_view_ddl = Signal()
@@ -0,0 +1,225 @@
+from typing import Optional
+
+from django.conf import settings
+from django.db.migrations import SeparateDatabaseAndState, RunPython, RunSQL
+
+from django_db_views.migration_functions import (
+    ForwardViewMigration,
+    BackwardViewMigration,
+    ForwardMaterializedViewMigration,
+    BackwardMaterializedViewMigration,
+    DropView,
+    DropMaterializedView,
+)
+from django_db_views.operations import (
+    ViewRunPython,
+    ViewDropRunPython,
+    ViewIndexRunPython,
+)
+
+VIEW_OPERATIONS = (ViewRunPython, ViewDropRunPython, ViewIndexRunPython)
+
+# forward migration class -> (backward migration class, drop migration class)
+MIGRATION_CLASSES = {
+    ForwardMaterializedViewMigration: (
+        BackwardMaterializedViewMigration,
+        DropMaterializedView,
+    ),
+    ForwardViewMigration: (BackwardViewMigration, DropView),
+}
+
+
+def get_view_key(code) -> tuple:
+    # old migrations have no engine, they are applied with engine of the default database.
+    return code.table_name, code.view_engine or settings.DATABASES["default"]["ENGINE"]
+
+
+def get_migration_classes(forward_migration) -> tuple:
+    for forward_class, migration_classes in MIGRATION_CLASSES.items():
+        if isinstance(forward_migration, forward_class):
+            return migration_classes
+    raise NotImplementedError
+
+
+def iter_view_operations(operation):
+    if isinstance(operation, VIEW_OPERATIONS):
+        yield operation
+    elif isinstance(operation, SeparateDatabaseAndState):
+        for database_operation in operation.database_operations:
+            yield from iter_view_operations(database_operation)
+
+
+def may_read_views(operation) -> bool:
+    """RunPython and RunSQL operations can read views, views have to be in the state they were at that point."""
+    if isinstance(operation, VIEW_OPERATIONS):
+        return False
+    if isinstance(operation, (RunPython, RunSQL)):
+        return True
+    if isinstance(operation, SeparateDatabaseAndState):
+        return any(
+            may_read_views(database_operation)
+            for database_operation in operation.database_operations
+        )
+    return False
+
+
+def replay_view_operation(views: dict, operation) -> None:
+    """Applies view operation to views: (table, engine) -> (forward migration, indexes) or None when dropped."""
+    code = operation.code
+    key = get_view_key(code)
+    if isinstance(operation, ViewRunPython):
+        views[key] = (code, dict(code.indexes))
+    elif isinstance(operation, ViewDropRunPython):
+        views[key] = None
+    elif views.get(key) is not None:
+        forward_migration, indexes = views[key]
+        indexes = {
+            index_name: index_sql
+            for index_name, index_sql in indexes.items()
+            if index_name not in code.remove_indexes
+        }
+        indexes.update(code.add_indexes)
+        views[key] = (forward_migration, indexes)
+
+
+def get_view_signature(view) -> Optional[tuple]:
+    if view is None:
+        return None
+    forward_migration, indexes = view
+    return (
+        get_migration_classes(forward_migration),
+        forward_migration.view_definition,
+        sorted(indexes.items()),
+        getattr(forward_migration, "with_data", True),
+    )
+
+
+def get_create_operation(view, previous_view=None) -> ViewRunPython:
+    forward_migration, indexes = view
+    backward_class, _ = get_migration_classes(forward_migration)
+    forward_kwargs = {"engine": forward_migration.view_engine}
+    backward_kwargs = {"engine": forward_migration.view_engine}
+    if indexes:
+        forward_kwargs["indexes"] = indexes
+    if not getattr(forward_migration, "with_data", True):
+        forward_kwargs["with_data"] = False
+    previous_view_definition = ""
+    if previous_view is not None:
+        previous_view_definition = previous_view[0].view_definition
+        if previous_view[1]:
+            backward_kwargs["indexes"] = previous_view[1]
+    return ViewRunPython(
+        type(forward_migration)(
+            forward_migration.view_definition,
+            forward_migration.table_name,
+            **forward_kwargs,
+        ),
+        backward_class(
+            previous_view_definition, forward_migration.table_name, **backward_kwargs
+        ),
+        atomic=False,
+    )
+
+
+def get_drop_operation(view) -> ViewDropRunPython:
+    forward_migration, indexes = view
+    backward_class, drop_class = get_migration_classes(forward_migration)
+    backward_kwargs = {"engine": forward_migration.view_engine}
+    if indexes:
+        backward_kwargs["indexes"] = indexes
+    return ViewDropRunPython(
+        drop_class(forward_migration.table_name, engine=forward_migration.view_engine),
+        backward_class(
+            forward_migration.view_definition,
+            forward_migration.table_name,
+            **backward_kwargs,
+        ),
+        atomic=False,
+    )
+
+
+def squash_view_operations(operations, previous_operations=()) -> list:
+    """
+    Collapses view operations into one operation per (table, engine) with the latest definition and indexes,
+    backward operation restores the view state before the operations (given by previous_operations of the app).
+    Views created and dropped within operations disappear.
+    View operations are not collapsed across RunPython and RunSQL operations, they see views
+    as they were in the squashed migrations.
+    """
+    squashed_operations = []
+    previous_operations = list(previous_operations)
+    segment = []
+    for operation in operations:
+        if not may_read_views(operation):
+            segment.append(operation)
+            continue
+        squashed_operations.extend(
+            collapse_view_operations(segment, previous_operations)
+        )
+        squashed_operations.append(operation)
+        previous_operations.extend(segment)
+        previous_operations.append(operation)
+        segment = []
+    squashed_operations.extend(collapse_view_operations(segment, previous_operations))
+    return squashed_operations
+
+
+def collapse_view_operations(operations, previous_operations) -> list:
+    """
+    Collapses view operations of operations without RunPython and RunSQL.
+    Views existing before the operations are replaced or dropped at the position of their first operation,
+    so schema operations on tables they read (e.g. AlterField) follow the new definition, same as before.
+    Created views follow other operations (in order views first appeared, so views are created after views they read).
+    Views changed by SeparateDatabaseAndState operations are not collapsed, their operations are kept in place.
+    """
+    previous_views = {}
+    for operation in previous_operations:
+        for view_operation in iter_view_operations(operation):
+            replay_view_operation(previous_views, view_operation)
+    kept_in_place = {
+        get_view_key(view_operation.code)
+        for operation in operations
+        if isinstance(operation, SeparateDatabaseAndState)
+        for view_operation in iter_view_operations(operation)
+    }
+
+    views = dict(previous_views)
+    changed_views = {}  # view -> position of its first operation, in order views first appeared
+    for position, operation in enumerate(operations):
+        if (
+            isinstance(operation, VIEW_OPERATIONS)
+            and get_view_key(operation.code) not in kept_in_place
+        ):
+            replay_view_operation(views, operation)
+            changed_views.setdefault(get_view_key(operation.code), position)
+
+    replace_operations = {}  # position -> operations of existing view
+    create_operations = []
+    for key, position in changed_views.items():
+        previous_view, view = previous_views.get(key), views.get(key)
+        if get_view_signature(previous_view) == get_view_signature(view):
+            continue
+        if previous_view is None:
+            create_operations.append(get_create_operation(view))
+            continue
+        if view is None:
+            replace_operations[position] = [get_drop_operation(previous_view)]
+        elif get_migration_classes(previous_view[0]) != get_migration_classes(view[0]):
+            # materialized view became a regular one or vice versa.
+            replace_operations[position] = [
+                get_drop_operation(previous_view),
+                get_create_operation(view),
+            ]
+        else:
+            replace_operations[position] = [get_create_operation(view, previous_view)]
+
+    squashed_operations = []
+    for position, operation in enumerate(operations):
+        if position in replace_operations:
+            squashed_operations.extend(replace_operations[position])
+        elif not (
+            isinstance(operation, VIEW_OPERATIONS)
+            and get_view_key(operation.code) not in kept_in_place
+        ):
+            squashed_operations.append(operation)
+    return squashed_operations + create_operations
@@ -0,0 +1,118 @@
+from typing import Optional
+
+from django.apps import apps
+from django.db.migrations.graph import MigrationGraph
+from django.db.migrations import SeparateDatabaseAndState
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState, ModelState
+
+from django_db_views.autodetector import ViewMigrationAutoDetector
+from django_db_views.db_view import DBViewsRegistry
+from django_db_views.dependency_graph import ViewDependencyGraph
+from django_db_views.operations import (
+    ViewRunPython,
+    ViewDropRunPython,
+    ViewIndexRunPython,
+)
+
+
+def get_app_labels_scope(app_labels, graph: MigrationGraph) -> set:
+    """
+    Returns the app labels with all apps they depend on:
+    through migrations, model relations and parents, and models used by view definitions.
+    """
+    leaf_nodes = {}
+    for node in graph.leaf_nodes():
+        leaf_nodes.setdefault(node[0], []).append(node)
+    dependency_graph = ViewDependencyGraph(view_models=())
+
+    scope = set()
+    visited_nodes = set()
+    to_visit = list(app_labels)
+    while to_visit:
+        app_label = to_visit.pop()
+        if app_label in scope:
+            continue
+        scope.add(app_label)
+        related_app_labels = set()
+        # migrations ancestors, each node is visited once for all apps.
+        nodes = list(leaf_nodes.get(app_label, ()))
+        while nodes:
+            node = nodes.pop()
+            if node in visited_nodes:
+                continue
+            visited_nodes.add(node)
+            related_app_labels.add(node[0])
+            nodes.extend(parent.key for parent in graph.node_map[node].parents)
+        try:
+            app_config = apps.get_app_config(app_label)
+        except LookupError:
+            app_config = None
+        for model in app_config.get_models(True) if app_config else ():
+            related_app_labels.update(get_related_app_labels(model, dependency_graph))
+        to_visit.extend(related_app_labels - scope)
+    return scope
+
+
+def get_related_app_labels(model, dependency_graph: ViewDependencyGraph) -> set:
+    opts = model._meta
+    related_models = [
+        field.related_model
+        for field in opts.local_fields + opts.local_many_to_many
+        if field.remote_field is not None and not isinstance(field.related_model, str)
+    ]
+    related_models.extend(opts.get_parent_list())
+    if opts.proxy_for_model is not None:
+        related_models.append(opts.proxy_for_model)
+    view_model = DBViewsRegistry.get(opts.db_table)
+    if view_model is not None:
+        related_models.extend(dependency_graph.get_inferred_dependencies(view_model))
+        related_models.extend(dependency_graph.get_declared_dependencies(view_model))
+    return {
+        related_model._meta.app_label
+        for related_model in related_models
+        if related_model is not None
+    }
+
+
+def get_view_migrations_state(
+    loader: MigrationLoader, app_labels: Optional[set] = None
+) -> ProjectState:
+    """
+    Project state at the end of migrations (of the apps and their migration ancestors when provided).
+    Only view operations are replayed, so the state contains only DBViewModelState entries,
+    view operations change only states of their own views, so other operations can be skipped.
+    Requires view_migration_context.
+    """
+    graph = loader.graph
+    state = ProjectState(real_apps=loader.unmigrated_apps)
+    planned = set()
+    for leaf_node in graph.leaf_nodes():
+        if app_labels is not None and leaf_node[0] not in app_labels:
+            continue
+        for node in graph.forwards_plan(leaf_node):
+            if node in planned:
+                continue
+            planned.add(node)
+            for operation in _get_view_state_operations(graph.nodes[node].operations):
+                operation.state_forwards(node[0], state)
+    return state
+
+
+def _get_view_state_operations(operations):
+    for operation in operations:
+        if isinstance(
+            operation, (ViewRunPython, ViewDropRunPython, ViewIndexRunPython)
+        ):
+            yield operation
+        elif isinstance(operation, SeparateDatabaseAndState):
+            yield from _get_view_state_operations(operation.state_operations)
+
+
+def get_view_models_state(app_labels: Optional[set] = None) -> ProjectState:
+    """Project state of current view models (of the apps when provided), other models are skipped."""
+    app_models = {}
+    for model in ViewMigrationAutoDetector.get_current_view_models(app_labels).values():
+        model_state = ModelState.from_model(model)
+        app_models[(model_state.app_label, model_state.name_lower)] = model_state
+    return ProjectState(app_models)
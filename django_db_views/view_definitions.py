@@ -0,0 +1,80 @@
+import weakref
+from typing import Optional
+
+from django.conf import settings
+
+# view model -> evaluated view definition, see get_view_definition_from_model.
+_view_definitions_cache = weakref.WeakKeyDictionary()
+
+
+def get_view_definition_from_model(view_model, engine: Optional[str] = None) -> dict:
+    """
+    Returns view definitions per engine, only definition of the engine when it's provided.
+    view_definition can be a string, a dict of strings per engine or a callable returning one of them,
+    dict values can be callables too, so only definitions of needed engines are built.
+    Definitions are evaluated once per process, changing view_definition attribute invalidates the cache,
+    for definitions that depend on other state use clear_view_definitions_cache.
+    """
+    entry = _get_cache_entry(view_model)
+    raw_view_definition = entry["raw"]
+    if isinstance(raw_view_definition, dict):
+        engines = [
+            view_engine
+            for view_engine in raw_view_definition
+            if engine is None or view_engine == engine
+        ]
+    else:
+        default_engine = settings.DATABASES["default"]["ENGINE"]
+        engines = [default_engine] if engine in (None, default_engine) else []
+
+    view_definitions = {}
+    for view_engine in engines:
+        if view_engine not in entry["definitions"]:
+            definition = raw_view_definition
+            if isinstance(raw_view_definition, dict):
+                definition = raw_view_definition[view_engine]
+            if callable(definition):
+                definition = definition()
+            entry["definitions"][view_engine] = get_cleaned_view_definition_value(
+                definition
+            )
+        view_definitions[view_engine] = entry["definitions"][view_engine]
+    return view_definitions
+
+
+def get_view_definition_engines(view_model) -> list:
+    """Engines the view is defined for, definitions of the engines (dict callable values) are not evaluated."""
+    raw_view_definition = _get_cache_entry(view_model)["raw"]
+    if isinstance(raw_view_definition, dict):
+        return list(raw_view_definition)
+    return [settings.DATABASES["default"]["ENGINE"]]
+
+
+def _get_cache_entry(view_model) -> dict:
+    view_definition = view_model.view_definition
+    # classmethods are bound on each access.
+    key = getattr(view_definition, "__func__", view_definition)
+    entry = _view_definitions_cache.get(view_model)
+    if entry is None or entry["key"] is not key:
+        entry = {
+            "key": key,
+            "raw": view_definition() if callable(view_definition) else view_definition,
+            "definitions": {},
+        }
+        _view_definitions_cache[view_model] = entry
+    return entry
+
+
+def clear_view_definitions_cache(view_model=None) -> None:
+    """Forgets evaluated definitions of the view model (all when not provided)."""
+    if view_model is None:
+        _view_definitions_cache.clear()
+    else:
+        _view_definitions_cache.pop(view_model, None)
+
+
+def get_cleaned_view_definition_value(view_definition: str) -> str:
+    assert isinstance(
+        view_definition, str
+    ), "View definition must be callable and return string or be itself a string."
+    return view_definition.strip()
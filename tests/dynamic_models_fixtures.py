@@ -11,8 +11,13 @@ from tests.test_app.models import (
     MultipleDBQueryViewQuestionStatTemplate,
     SimpleMaterializedViewWithoutDependenciesTemplate,
     SimpleMaterializedViewWithIndexTemplate,
+    DependentMaterializedViewTemplate,
     SecondSimpleViewWithoutDependenciesTemplate,
     ViewOnSpecificSchemaTemplate,
+    ViewOnMaterializedViewTemplate,
+    QuestionCountTemplate,
+    QuestionTotalTemplate,
+    NotPopulatedViewTemplate,
 )
 
 
@@ -96,8 +101,43 @@ def SimpleMaterializedViewWithIndex():
     return define_model(SimpleMaterializedViewWithIndexTemplate, DBMaterializedView)
 
 
+@pytest.fixture
+def DependentMaterializedView():
+    from django_db_views.db_view import DBMaterializedView
+
+    return define_model(DependentMaterializedViewTemplate, DBMaterializedView)
+
+
 @pytest.fixture
 def ViewOnSpecificSchema():
     from django_db_views.db_view import DBView
 
     return define_model(ViewOnSpecificSchemaTemplate, DBView)
+
+
+@pytest.fixture
+def ViewOnMaterializedView():
+    from django_db_views.db_view import DBView
+
+    return define_model(ViewOnMaterializedViewTemplate, DBView)
+
+
+@pytest.fixture
+def QuestionCount(Question):
+    from django_db_views.db_view import DBMaterializedView
+
+    return define_model(QuestionCountTemplate, DBMaterializedView)
+
+
+@pytest.fixture
+def QuestionTotal(Question):
+    from django_db_views.db_view import DBMaterializedView
+
+    return define_model(QuestionTotalTemplate, DBMaterializedView)
+
+
+@pytest.fixture
+def NotPopulatedView():
+    from django_db_views.db_view import DBMaterializedView
+
+    return define_model(NotPopulatedViewTemplate, DBMaterializedView)
@@ -3,6 +3,8 @@ import importlib
 import pytest
 from django.apps import apps
 
+from django_db_views.view_definitions import clear_view_definitions_cache
+
 
 @pytest.fixture(autouse=True, scope="function")
 def temp_migrations_dir(settings, tmpdir, mocker):
@@ -32,11 +34,17 @@ def temp_migrations_dir(settings, tmpdir, mocker):
 
 @pytest.fixture(autouse=True, scope="function")
 def dynamic_models_cleanup():
+    from django_db_views.db_view import DBViewsRegistry
+
     try:
         yield None
     finally:
         # We delete all dynamically created models
         test_app_models = list(apps.all_models["test_app"].keys())
         for model_name in test_app_models:
-            del apps.all_models["test_app"][model_name]
+            model = apps.all_models["test_app"].pop(model_name)
+            # views are registered too, other tests don't expect them.
+            if DBViewsRegistry.get(model._meta.db_table) is model:
+                DBViewsRegistry.pop(model._meta.db_table)
         apps.clear_cache()
+        clear_view_definitions_cache()
@@ -3,6 +3,8 @@ from django.db import models
 from django.db.models import F, Index
 from django.utils import timezone
 
+from django_db_views.indexes import UniqueIndex
+
 
 class QuestionTemplate:
     text = models.CharField(max_length=200)
@@ -161,7 +163,23 @@ class SimpleMaterializedViewWithIndexTemplate:
         managed = False
         db_table = "simple_materialized_view_without_dependencies"
         # only django 3.2 +
-        indexes = [Index(fields=["current_date_time"])]
+        indexes = [
+            UniqueIndex(
+                fields=["current_date_time"], name="simple_mv_current_date_time_uniq"
+            )
+        ]
+
+
+class DependentMaterializedViewTemplate:
+    current_date_time = models.DateTimeField(primary_key=True)
+
+    view_definition = """
+              Select * From simple_materialized_view_without_dependencies
+            """
+
+    class Meta:
+        managed = False
+        db_table = "dependent_materialized_view"
 
 
 class ViewOnSpecificSchemaTemplate:
@@ -178,3 +196,54 @@ class ViewOnSpecificSchemaTemplate:
     class Meta:
         managed = False
         db_table = 'extra_schema"."view_on_specific_schema'
+
+
+class ViewOnMaterializedViewTemplate:
+    current_date_time = models.DateTimeField(primary_key=True)
+
+    view_definition = """
+              Select * From simple_materialized_view_without_dependencies
+            """
+
+    class Meta:
+        managed = False
+        db_table = "view_on_materialized_view"
+
+
+class QuestionCountTemplate:
+    id = models.IntegerField(primary_key=True)
+    total = models.IntegerField()
+
+    view_definition = "SELECT 1 AS id, count(*) AS total FROM test_app_question"
+    refresh_on_change = True
+    refresh_window = 0.5
+
+    class Meta:
+        managed = False
+        db_table = "question_count"
+
+
+class QuestionTotalTemplate:
+    id = models.IntegerField(primary_key=True)
+    total = models.IntegerField()
+
+    view_definition = {
+        "django.db.backends.sqlite3": "SELECT 1 AS id, count(*) AS total FROM test_app_question"
+    }
+
+    class Meta:
+        managed = False
+        db_table = "question_total"
+        indexes = [Index(fields=["total"], name="question_total_idx")]
+
+
+class NotPopulatedViewTemplate:
+    id = models.IntegerField(primary_key=True)
+
+    view_definition = "SELECT 1 AS id"
+    with_data = False
+
+    class Meta:
+        managed = False
+        db_table = "not_populated_view"
+        indexes = [UniqueIndex(fields=["id"], name="not_populated_uniq")]
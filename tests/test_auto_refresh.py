@@ -0,0 +1,62 @@
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from django_db_views import auto_refresh
+from django_db_views.auto_refresh import (
+    connect_source_models,
+    get_claims_cache,
+    get_refresher,
+    get_source_models,
+    run_scheduled_refresh,
+)
+from tests.decorators import roll_back_schema
+from tests.fixturies import dynamic_models_cleanup  # noqa
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_refresh_on_source_model_change(
+    temp_migrations_dir, settings, Question, QuestionCount
+):
+    assert get_source_models(QuestionCount) == {Question}
+    get_claims_cache().clear()
+    call_command("makemigrations", "test_app")
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    connect_source_models([QuestionCount])
+    assert auto_refresh._source_views is None  # resolved on the first change
+    refresher = get_refresher()
+
+    # changes of one window are merged into one refresh
+    with transaction.atomic():
+        for number in range(3):
+            Question.objects.create(text="question_%s" % number)
+        assert refresher.timers == {}  # scheduled on commit
+    assert list(refresher.timers) == [(QuestionCount, "default")]
+    Question.objects.create(text="question_3")
+    assert len(refresher.timers) == 1
+    with transaction.atomic():
+        refresher.flush()
+        # connection of the caller stays usable
+        assert QuestionCount.objects.get().total == 4
+    assert refresher.timers == {}
+
+    # refreshed at the end of the window, off the calling thread
+    Question.objects.filter(text="question_3").delete()
+    timer = refresher.timers[(QuestionCount, "default")]
+    assert QuestionCount.objects.get().total == 4
+    timer.join(timeout=5)
+    assert QuestionCount.objects.get().total == 3
+
+    # scheduling can be handed over to a task queue
+    scheduled = []
+    settings.DB_VIEWS_AUTO_REFRESH_SCHEDULER = lambda *args: scheduled.append(args)
+    Question.objects.create(text="question_4")
+    Question.objects.create(text="question_5")
+    assert scheduled == [("test_app.QuestionCount", "default", 0.5)]
+    with transaction.atomic():
+        assert run_scheduled_refresh("test_app.QuestionCount", "default")
+        assert QuestionCount.objects.get().total == 5
+    auto_refresh._connected_views.discard(QuestionCount)
+    auto_refresh._source_views = None
@@ -1,4 +1,23 @@
+import pytest
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.migrations import Migration, SeparateDatabaseAndState, CreateModel
+from django.db.migrations.graph import MigrationGraph
+from django.db.migrations.state import ProjectState
+from django.db.models import AutoField
+
 from django_db_views.autodetector import ViewMigrationAutoDetector
+from django_db_views.migration_functions import (
+    ForwardViewMigration,
+    BackwardViewMigration,
+)
+from django_db_views.context_manager import view_migration_context
+from django_db_views.indexes import get_view_indexes_from_model
+from django_db_views.operations import ViewRunPython, get_table_engine_name_hash
+from django_db_views.state import (
+    get_app_labels_scope,
+    get_view_models_state,
+    get_view_migrations_state,
+)
 
 
 def test_is_same_views():
@@ -24,3 +43,183 @@ def test_is_same_views():
         """,
         "SELECT COUNT(*) FROM table WHERE is_countable GROUP BY kind",
     )
+
+
+def get_view_operation(
+    view_definition, table_name, engine, previous_view_definition=""
+):
+    return ViewRunPython(
+        ForwardViewMigration(view_definition, table_name, engine=engine),
+        BackwardViewMigration(previous_view_definition, table_name, engine=engine),
+        atomic=False,
+    )
+
+
+def get_migration(name, app_label, operations):
+    migration = Migration(name, app_label)
+    migration.operations = operations
+    return migration
+
+
+def test_previous_view_definitions_index():
+    postgres = "django.db.backends.postgresql"
+    sqlite = "django.db.backends.sqlite3"
+    graph = MigrationGraph()
+    graph.add_node(
+        ("test_app", "0001_initial"),
+        get_migration(
+            "0001_initial",
+            "test_app",
+            [
+                get_view_operation("select 1", "view_a", postgres),
+                get_view_operation("select 1", "view_a", sqlite),
+                get_view_operation("select 1", "view_b", postgres),
+            ],
+        ),
+    )
+    graph.add_node(
+        ("test_app", "0002_view_migration"),
+        get_migration(
+            "0002_view_migration",
+            "test_app",
+            [
+                SeparateDatabaseAndState(
+                    database_operations=[
+                        get_view_operation("select 2", "view_a", postgres, "select 1")
+                    ]
+                )
+            ],
+        ),
+    )
+    graph.add_node(
+        ("other_app", "0001_initial"),
+        get_migration(
+            "0001_initial",
+            "other_app",
+            [get_view_operation("select 3", "view_c", postgres)],
+        ),
+    )
+    graph.add_dependency(
+        "test_app.0002_view_migration",
+        ("test_app", "0002_view_migration"),
+        ("test_app", "0001_initial"),
+    )
+
+    autodetector = ViewMigrationAutoDetector(ProjectState(), ProjectState())
+    index = autodetector.get_previous_view_definitions_index(graph, {"test_app"})
+
+    assert index == {
+        ("test_app", "view_a", postgres): "select 2",
+        ("test_app", "view_a", sqlite): "select 1",
+        ("test_app", "view_b", postgres): "select 1",
+    }
+    assert (
+        autodetector.get_previous_view_definition_state(
+            graph, "other_app", "view_c", postgres
+        )
+        == "select 3"
+    )
+    assert (
+        autodetector.get_previous_view_definition_state(
+            graph, "other_app", "view_a", postgres
+        )
+        == ""
+    )
+
+
+def test_app_labels_scope(Question, Choice, RawViewQuestionStat):
+    graph = MigrationGraph()
+    graph.add_node(
+        ("django_db_views", "0001_initial"),
+        get_migration("0001_initial", "django_db_views", []),
+    )
+    graph.add_node(
+        ("test_app", "0001_initial"), get_migration("0001_initial", "test_app", [])
+    )
+    graph.add_node(
+        ("other_app", "0001_initial"), get_migration("0001_initial", "other_app", [])
+    )
+    graph.add_dependency(
+        "test_app.0001_initial",
+        ("test_app", "0001_initial"),
+        ("django_db_views", "0001_initial"),
+    )
+
+    assert get_app_labels_scope({"test_app"}, graph) == {"test_app", "django_db_views"}
+    assert get_app_labels_scope({"django_db_views"}, graph) == {"django_db_views"}
+
+
+def test_view_only_states(mocker, Question, RawViewQuestionStat):
+    postgres = "django.db.backends.postgresql"
+    graph = MigrationGraph()
+    graph.add_node(
+        ("test_app", "0001_initial"),
+        get_migration(
+            "0001_initial",
+            "test_app",
+            [
+                CreateModel("Question", [("id", AutoField(primary_key=True))]),
+                get_view_operation("select 1", "view_a", postgres),
+                get_view_operation("select 1", "view_b", postgres),
+            ],
+        ),
+    )
+    graph.add_node(
+        ("test_app", "0002_view_migration"),
+        get_migration(
+            "0002_view_migration",
+            "test_app",
+            [get_view_operation("select 2", "view_a", postgres, "select 1")],
+        ),
+    )
+    graph.add_dependency(
+        "test_app.0002_view_migration",
+        ("test_app", "0002_view_migration"),
+        ("test_app", "0001_initial"),
+    )
+    loader = mocker.Mock(graph=graph, unmigrated_apps=set())
+
+    with view_migration_context():
+        migrations_state = get_view_migrations_state(loader, {"test_app"})
+    assert sorted(migrations_state.models) == [
+        ("test_app", get_table_engine_name_hash("view_a", postgres)),
+        ("test_app", get_table_engine_name_hash("view_b", postgres)),
+    ]
+    assert (
+        migrations_state.models[
+            "test_app", get_table_engine_name_hash("view_a", postgres)
+        ].view_definition
+        == "select 2"
+    )
+    with view_migration_context():
+        assert get_view_migrations_state(loader, {"other_app"}).models == {}
+
+    models_state = get_view_models_state({"test_app"})
+    assert list(models_state.models) == [
+        ("test_app", RawViewQuestionStat._meta.model_name)
+    ]
+    assert get_view_models_state({"other_app"}).models == {}
+
+
+def test_view_indexes_skipped_for_engine_that_can_not_be_loaded(
+    monkeypatch, SimpleMaterializedViewWithIndex
+):
+    # configured database whose driver is not installed does not break other engines.
+    monkeypatch.setitem(
+        connections.databases,
+        "not_installed",
+        {
+            **connections.databases[DEFAULT_DB_ALIAS],
+            "ENGINE": "tests.missing_driver_backend",
+        },
+    )
+    assert get_view_indexes_from_model(
+        SimpleMaterializedViewWithIndex, "django.db.backends.postgresql"
+    )
+    with pytest.warns(UserWarning, match="backend can't be loaded"):
+        assert (
+            get_view_indexes_from_model(
+                SimpleMaterializedViewWithIndex, "tests.not_installed_backend"
+            )
+            == {}
+        )
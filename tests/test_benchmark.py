@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+from tests.utils import get_base_path
+
+
+def test_makeviewmigrations_benchmark_runs(tmp_path):
+    # benchmark configures its own django project, so it runs in a separate process.
+    result = subprocess.run(
+        [
+            sys.executable,
+            str(get_base_path() / "benchmarks" / "benchmark_makeviewmigrations.py"),
+            "--apps=2",
+            "--views=4",
+            "--migrations=2",
+            "--repeat=1",
+            "--json=%s" % (tmp_path / "results.json"),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert "Detected changes in 2 migration(s) per run" in result.stdout
+    assert (tmp_path / "results.json").exists()
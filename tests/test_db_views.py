@@ -5,7 +5,12 @@ from django.apps import apps
 from django.core.management import call_command
 from django.db import connection
 
-from django_db_views.db_view import DBViewsRegistry
+from django_db_views.db_view import (
+    DBViewsRegistry,
+    DBView,
+    DBMaterializedView,
+    ViewsRegistry,
+)
 from tests.asserts_utils import is_view_exists
 from tests.decorators import roll_back_schema
 from tests.utils import get_base_path
@@ -341,3 +346,86 @@ def test_view_defined_on_schema(temp_migrations_dir, ViewOnSpecificSchema):
     assert ViewOnSpecificSchema.objects.all().count() == 2
     call_command("migrate", "test_app", "zero")
     assert not is_view_exists(ViewOnSpecificSchema._meta.db_table)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_view_is_replaced_when_columns_are_compatible(
+    temp_migrations_dir, SimpleViewWithoutDependencies
+):
+    table_name = SimpleViewWithoutDependencies._meta.db_table
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    # view that depends on our view, can't be dropped without cascade.
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE VIEW dependent_view AS SELECT id FROM %s" % table_name)
+    try:
+        # appended column
+        SimpleViewWithoutDependencies.view_definition = """
+              Select *
+                 From  (values (1, 'dummy_1', 10)) A(id, name, votes)
+            """
+        call_command("makeviewmigrations", "test_app", name="append_column")
+        call_command("migrate", "test_app")
+        assert SimpleViewWithoutDependencies.objects.all().count() == 1
+        # backward migration removes column, view has to be recreated.
+        with pytest.raises(Exception, match="dependent_view"):
+            call_command("migrate", "test_app", "0001")
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("DROP VIEW dependent_view")
+    call_command("migrate", "test_app", "0001")
+    assert SimpleViewWithoutDependencies.objects.all().count() == 2
+
+
+def test_views_registry_indexes(
+    SimpleViewWithoutDependencies,
+    MultipleDBRawView,
+    SimpleMaterializedViewWithoutDependencies,
+):
+    postgres = "django.db.backends.postgresql"
+    sqlite = "django.db.backends.sqlite3"
+    registry = ViewsRegistry(
+        (view_model._meta.db_table, view_model)
+        for view_model in (
+            SimpleViewWithoutDependencies,
+            MultipleDBRawView,
+            SimpleMaterializedViewWithoutDependencies,
+        )
+    )
+    assert registry[MultipleDBRawView._meta.db_table] is MultipleDBRawView
+    assert registry.get_by_app_label("test_app") == [
+        SimpleViewWithoutDependencies,
+        MultipleDBRawView,
+        SimpleMaterializedViewWithoutDependencies,
+    ]
+    assert registry.get_by_app_label("other_app") == []
+    assert registry.get_by_base_class(DBMaterializedView) == [
+        SimpleMaterializedViewWithoutDependencies
+    ]
+    assert len(registry.get_by_base_class(DBView)) == 3
+    # default database is postgres
+    assert registry.get_by_engine(postgres) == registry.get_by_database("default")
+    assert registry.get_by_engine(sqlite) == [MultipleDBRawView]
+    assert registry.get_by_database("sqlite") == [MultipleDBRawView]
+
+    # changed definition changes engines of the view
+    assert SimpleViewWithoutDependencies not in DBViewsRegistry.get_by_engine(sqlite)
+    SimpleViewWithoutDependencies.view_definition = {sqlite: "select 1 as id"}
+    assert SimpleViewWithoutDependencies in DBViewsRegistry.get_by_engine(sqlite)
+
+    registry.pop(MultipleDBRawView._meta.db_table)
+    assert MultipleDBRawView not in registry.get_by_app_label("test_app")
+    assert registry.get_by_engine(sqlite) == [SimpleViewWithoutDependencies]
+    # the same table registered again replaces the view in indexes
+    registry[SimpleViewWithoutDependencies._meta.db_table] = MultipleDBRawView
+    assert registry.get_by_app_label("test_app") == [
+        SimpleMaterializedViewWithoutDependencies,
+        MultipleDBRawView,
+    ]
+    assert registry.get_by_base_class(DBMaterializedView) == [
+        SimpleMaterializedViewWithoutDependencies
+    ]
+    registry.clear()
+    assert registry.get_by_base_class(DBView) == []
+    assert DBViewsRegistry.get_by_app_label("test_app")
@@ -0,0 +1,49 @@
+from django_db_views.dependency_graph import (
+    ViewDependencyGraph,
+    get_referenced_table_names,
+)
+
+
+def test_get_referenced_table_names():
+    assert get_referenced_table_names(
+        """
+        SELECT q.id, count(*) FROM test_app_question q
+        JOIN "test_app_choice" c ON c.question_id = q.id
+        LEFT OUTER JOIN extra_schema.tag t ON t.id = q.tag_id
+        WHERE q.id IN (SELECT question_id FROM vote)
+        GROUP BY q.id
+        """
+    ) == {"test_app_question", "test_app_choice", "extra_schema.tag", "vote"}
+    assert get_referenced_table_names(
+        "WITH stat AS (SELECT * FROM choice) SELECT * FROM stat, question"
+    ) == {"choice", "question"}
+    assert (
+        get_referenced_table_names(
+            "Select * From  (values (1, 'dummy_1'),(2, 'dummy_2')) A(id, name)"
+        )
+        == set()
+    )
+
+
+def test_view_dependency_graph(
+    Question,
+    Choice,
+    RawViewQuestionStat,
+    SimpleMaterializedViewWithoutDependencies,
+    DependentMaterializedView,
+):
+    graph = ViewDependencyGraph()
+
+    assert graph.get_dependencies(RawViewQuestionStat) == {Question, Choice}
+    assert graph.get_view_dependencies(RawViewQuestionStat) == set()
+    assert graph.get_dependents(Question) == {RawViewQuestionStat}
+    assert graph.get_source_models(RawViewQuestionStat) == {Question, Choice}
+    assert graph.get_dependencies(DependentMaterializedView) == {
+        SimpleMaterializedViewWithoutDependencies
+    }
+    assert graph.get_dependents(
+        SimpleMaterializedViewWithoutDependencies, recursive=True
+    ) == {DependentMaterializedView}
+    assert graph.get_ordered_views(
+        [DependentMaterializedView, SimpleMaterializedViewWithoutDependencies]
+    ) == [SimpleMaterializedViewWithoutDependencies, DependentMaterializedView]
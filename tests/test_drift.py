@@ -0,0 +1,123 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, connections
+
+from django_db_views.drift import (
+    check_views_drift,
+    get_deployed_views,
+    OK,
+    MISSING,
+    KIND_CHANGED,
+    CHANGED,
+    UNVERIFIED,
+)
+from tests.decorators import roll_back_schema
+from tests.fixturies import dynamic_models_cleanup  # noqa
+
+
+def get_statuses(results) -> dict:
+    return {result.view_model: result.status for result in results}
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_check_views_drift(
+    temp_migrations_dir,
+    SimpleViewWithoutDependencies,
+    SimpleMaterializedViewWithoutDependencies,
+):
+    view_models = [
+        SimpleViewWithoutDependencies,
+        SimpleMaterializedViewWithoutDependencies,
+    ]
+    assert get_statuses(check_views_drift(view_models)) == {
+        SimpleViewWithoutDependencies: MISSING,
+        SimpleMaterializedViewWithoutDependencies: MISSING,
+    }
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    deployed_views = get_deployed_views(connection)
+    table_name = SimpleMaterializedViewWithoutDependencies._meta.db_table
+    assert deployed_views[table_name].materialized
+    assert deployed_views["public.%s" % table_name] == deployed_views[table_name]
+    assert get_statuses(check_views_drift(view_models)) == {
+        SimpleViewWithoutDependencies: OK,
+        SimpleMaterializedViewWithoutDependencies: OK,
+    }
+
+    SimpleViewWithoutDependencies.view_definition = """
+        Select *
+         From  (values (3, 'dummy_3')) A(id, name)
+    """
+    results = check_views_drift(view_models)
+    assert get_statuses(results) == {
+        SimpleViewWithoutDependencies: CHANGED,
+        SimpleMaterializedViewWithoutDependencies: OK,
+    }
+    assert "dummy_1" in results[0].deployed_definition
+    assert "dummy_3" in results[0].definition
+
+    out = StringIO()
+    with pytest.raises(SystemExit):
+        call_command(
+            "checkviews",
+            "test_app.SimpleViewWithoutDependencies",
+            "test_app.SimpleMaterializedViewWithoutDependencies",
+            check=True,
+            stdout=out,
+        )
+    output = out.getvalue()
+    assert "test_app.SimpleViewWithoutDependencies CHANGED" in output
+    assert "SimpleMaterializedViewWithoutDependencies" not in output
+    assert "Checked 2 view(s)" in output
+
+
+@pytest.mark.django_db(transaction=True)
+def test_check_views_drift_without_fingerprints(SimpleViewWithoutDependencies):
+    table_name = SimpleViewWithoutDependencies._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE MATERIALIZED VIEW %s AS SELECT 1 AS id, 'a' AS name" % table_name
+        )
+    try:
+        assert get_statuses(check_views_drift([SimpleViewWithoutDependencies])) == {
+            SimpleViewWithoutDependencies: KIND_CHANGED
+        }
+        with connection.cursor() as cursor:
+            cursor.execute("DROP MATERIALIZED VIEW %s" % table_name)
+            cursor.execute(
+                "CREATE VIEW %s AS %s"
+                % (table_name, SimpleViewWithoutDependencies.view_definition)
+            )
+        # postgres rewrites the definition, it can't be verified without fingerprint.
+        assert get_statuses(check_views_drift([SimpleViewWithoutDependencies])) == {
+            SimpleViewWithoutDependencies: UNVERIFIED
+        }
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("DROP VIEW IF EXISTS %s" % table_name)
+            cursor.execute("DROP MATERIALIZED VIEW IF EXISTS %s" % table_name)
+
+
+@pytest.mark.django_db(databases=["sqlite"], transaction=True)
+def test_check_views_drift_sqlite(MultipleDBRawView):
+    sqlite = "django.db.backends.sqlite3"
+    table_name = MultipleDBRawView._meta.db_table
+    with connections["sqlite"].cursor() as cursor:
+        cursor.execute(
+            'CREATE VIEW "%s" AS %s'
+            % (table_name, MultipleDBRawView.view_definition[sqlite])
+        )
+    try:
+        assert get_statuses(check_views_drift([MultipleDBRawView], using="sqlite")) == {
+            MultipleDBRawView: OK
+        }
+        MultipleDBRawView.view_definition = {sqlite: "Select 3 as id, 'c' as name"}
+        assert get_statuses(check_views_drift([MultipleDBRawView], using="sqlite")) == {
+            MultipleDBRawView: CHANGED
+        }
+    finally:
+        with connections["sqlite"].cursor() as cursor:
+            cursor.execute('DROP VIEW IF EXISTS "%s"' % table_name)
@@ -0,0 +1,45 @@
+import pytest
+from django.db import connection
+
+from django_db_views.fixtures import create_views, drop_views
+from django_db_views.fingerprints import get_fingerprints
+from tests.asserts_utils import is_view_exists
+
+
+@pytest.mark.django_db(transaction=True)
+def test_create_views_keeps_unchanged_views(
+    SimpleViewWithoutDependencies,
+    SimpleMaterializedViewWithoutDependencies,
+    DependentMaterializedView,
+):
+    try:
+        created = create_views(connection)
+        assert set(created) == {
+            SimpleViewWithoutDependencies,
+            SimpleMaterializedViewWithoutDependencies,
+            DependentMaterializedView,
+        }
+        assert created.index(SimpleMaterializedViewWithoutDependencies) < (
+            created.index(DependentMaterializedView)
+        )
+        assert set(get_fingerprints(connection)) == {
+            view_model._meta.db_table for view_model in created
+        }
+        # reused database, nothing changed.
+        assert create_views(connection, keepdb=True) == []
+
+        # changed view is recreated with views that depend on it.
+        SimpleMaterializedViewWithoutDependencies.view_definition = """
+            Select * From (values (NOW() - interval '1 day')) A(current_date_time)
+        """
+        assert create_views(connection, keepdb=True) == [
+            SimpleMaterializedViewWithoutDependencies,
+            DependentMaterializedView,
+        ]
+        assert create_views(connection, keepdb=True) == []
+        assert DependentMaterializedView.objects.count() == 1
+    finally:
+        drop_views(connection)
+    for view_model in created:
+        assert not is_view_exists(view_model._meta.db_table)
+    assert get_fingerprints(connection) == {}
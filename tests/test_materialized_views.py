@@ -1,6 +1,44 @@
+import asyncio
+from datetime import timedelta
+from io import StringIO
+
 import pytest
-from django.core.management import call_command
+from django.core.management import call_command, CommandError
+from django.test.utils import CaptureQueriesContext
+from django.db import (
+    connection,
+    connections,
+    transaction,
+    DatabaseError,
+    NotSupportedError,
+)
+from django.db.models import Index
 
+from django_db_views.drift import check_views_drift, OK
+from django_db_views.fingerprints import (
+    get_fingerprints,
+    forget_fingerprint_table,
+    FINGERPRINT_TABLE,
+)
+from django_db_views.migration_functions import ForwardViewMigration
+from django_db_views.models import MaterializedViewRefresh
+from django_db_views.refresh import (
+    refresh_all,
+    get_refresh_batches,
+    arefresh_all,
+    get_unpopulated_views,
+    get_materialized_views,
+)
+from django_db_views.refresh_strategies import (
+    rewrite_index_definition,
+    get_refresh_lock_key,
+)
+from django_db_views.signals import (
+    pre_refresh,
+    post_refresh,
+    pre_view_ddl,
+    post_view_ddl,
+)
 from tests.asserts_utils import is_view_exists
 from tests.decorators import roll_back_schema
 from tests.fixturies import dynamic_models_cleanup  # noqa
@@ -34,7 +72,6 @@ def test_materialized_db_view_based_on_raw_sql_without_dependencies(
     assert not is_view_exists(SimpleMaterializedViewWithoutDependencies._meta.db_table)
 
 
-@pytest.mark.skip(reason="Future feature.")
 @pytest.mark.django_db(transaction=True)
 @roll_back_schema
 def test_materialized_db_view_based_on_raw_sql_with_indexes(
@@ -67,3 +104,561 @@ def test_materialized_db_view_based_on_raw_sql_with_indexes(
     # backward migration
     call_command("migrate", "test_app", "zero")
     assert not is_view_exists(SimpleMaterializedViewWithIndex._meta.db_table)
+
+
+def test_refresh_batches_follow_view_dependencies(
+    SimpleMaterializedViewWithoutDependencies,
+    DependentMaterializedView,
+    SimpleViewWithoutDependencies,
+):
+    assert get_refresh_batches(
+        [DependentMaterializedView, SimpleMaterializedViewWithoutDependencies]
+    ) == [[SimpleMaterializedViewWithoutDependencies], [DependentMaterializedView]]
+    assert get_refresh_batches([DependentMaterializedView]) == [
+        [DependentMaterializedView]
+    ]
+
+
+def test_refresh_batches_contain_views_defined_for_the_database(
+    SimpleMaterializedViewWithoutDependencies, QuestionTotal
+):
+    # QuestionTotal is defined for sqlite only.
+    assert get_refresh_batches(using="default") == [
+        [SimpleMaterializedViewWithoutDependencies]
+    ]
+    assert QuestionTotal in get_materialized_views(using="sqlite")
+    assert QuestionTotal not in get_materialized_views(using="default")
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_refresh_all_materialized_views(
+    temp_migrations_dir,
+    SimpleMaterializedViewWithoutDependencies,
+    DependentMaterializedView,
+):
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    current_date_time = SimpleMaterializedViewWithoutDependencies.objects.get()
+    assert DependentMaterializedView.objects.get().current_date_time == (
+        current_date_time.current_date_time
+    )
+
+    results = refresh_all(workers=2)
+
+    assert [result.view_model for result in results] == [
+        SimpleMaterializedViewWithoutDependencies,
+        DependentMaterializedView,
+    ]
+    assert all(result.exception is None for result in results)
+    refreshed_date_time = (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+    )
+    assert refreshed_date_time != current_date_time.current_date_time
+    assert DependentMaterializedView.objects.get().current_date_time == (
+        refreshed_date_time
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_async_refresh(
+    temp_migrations_dir,
+    SimpleMaterializedViewWithoutDependencies,
+    DependentMaterializedView,
+):
+    view_models = [DependentMaterializedView, SimpleMaterializedViewWithoutDependencies]
+    # views are not created yet
+    results = asyncio.run(arefresh_all(view_models, fail_silently=True))
+    assert [(result.view_model, result.skipped) for result in results] == [
+        (SimpleMaterializedViewWithoutDependencies, False),
+        (DependentMaterializedView, True),
+    ]
+    assert results[0].exception is not None
+
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    current_date_time = (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+    )
+    asyncio.run(SimpleMaterializedViewWithoutDependencies.arefresh())
+    refreshed_date_time = (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+    )
+    assert refreshed_date_time > current_date_time
+    assert DependentMaterializedView.objects.get().current_date_time == (
+        current_date_time
+    )
+
+    callback_results = []
+    results = asyncio.run(
+        arefresh_all(view_models, concurrency=2, callback=callback_results.append)
+    )
+    assert [result.view_model for result in results] == [
+        SimpleMaterializedViewWithoutDependencies,
+        DependentMaterializedView,
+    ]
+    assert callback_results == results
+    assert DependentMaterializedView.objects.get().current_date_time == (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+    )
+
+
+def test_rewrite_index_definition():
+    assert (
+        rewrite_index_definition(
+            'CREATE UNIQUE INDEX "Some Index" ON public.some_view USING btree (id) WHERE (id > 1)',
+            "some_index_shadow",
+            'public."some_view_shadow"',
+        )
+        == 'CREATE UNIQUE INDEX some_index_shadow ON public."some_view_shadow" USING btree (id) WHERE (id > 1)'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_materialized_view_swap_refresh(
+    temp_migrations_dir, SimpleMaterializedViewWithoutDependencies
+):
+    table_name = SimpleMaterializedViewWithoutDependencies._meta.db_table
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE UNIQUE INDEX swap_test_idx ON %s (current_date_time)" % table_name
+        )
+    current_date_time = (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+    )
+
+    SimpleMaterializedViewWithoutDependencies.refresh(strategy="swap")
+
+    assert is_view_exists(table_name)
+    assert (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+        != current_date_time
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relname LIKE %s ORDER BY relname",
+            [table_name[:20] + "%"],
+        )
+        assert [name for (name,) in cursor.fetchall()] == [table_name]
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = %s", [table_name]
+        )
+        assert [name for (name,) in cursor.fetchall()] == ["swap_test_idx"]
+    # concurrently refresh works, cus unique index was rebuilt.
+    SimpleMaterializedViewWithoutDependencies.refresh(concurrently=True)
+
+
+def get_view_indexes(table_name: str) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = %s ORDER BY indexname",
+            [table_name],
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_materialized_view_indexes_changes(
+    temp_migrations_dir, SimpleMaterializedViewWithIndex
+):
+    table_name = SimpleMaterializedViewWithIndex._meta.db_table
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    assert get_view_indexes(table_name) == ["simple_mv_current_date_time_uniq"]
+
+    SimpleMaterializedViewWithIndex._meta.indexes = [
+        Index(fields=["current_date_time"], name="simple_mv_current_date_time_idx")
+    ]
+    call_command("makeviewmigrations", "test_app", name="change_indexes")
+    migration = (temp_migrations_dir / "0002_change_indexes.py").read()
+    assert "ViewIndexRunPython" in migration
+    assert "ViewRunPython" not in migration
+    call_command("migrate", "test_app")
+    assert get_view_indexes(table_name) == ["simple_mv_current_date_time_idx"]
+
+    # indexes are recreated with view
+    SimpleMaterializedViewWithIndex.view_definition = """
+              Select *
+                 From  (values (NOW() + interval '1 day')) A(current_date_time)
+            """
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    assert get_view_indexes(table_name) == ["simple_mv_current_date_time_idx"]
+    call_command("makeviewmigrations", "test_app", check_changes=True)
+
+    call_command("migrate", "test_app", "0002")
+    assert get_view_indexes(table_name) == ["simple_mv_current_date_time_idx"]
+    call_command("migrate", "test_app", "0001")
+    assert get_view_indexes(table_name) == ["simple_mv_current_date_time_uniq"]
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_materialized_view_refresh_bookkeeping(
+    temp_migrations_dir, settings, SimpleMaterializedViewWithoutDependencies
+):
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    assert SimpleMaterializedViewWithoutDependencies.last_refreshed() is None
+
+    assert SimpleMaterializedViewWithoutDependencies.refresh_if_stale(
+        max_age=timedelta(hours=1)
+    )
+    refresh = MaterializedViewRefresh.objects.get()
+    assert refresh.view_name == SimpleMaterializedViewWithoutDependencies._meta.db_table
+    assert refresh.using == "default"
+    assert refresh.strategy == "refresh"
+    assert refresh.row_count is None  # opt-in
+    assert refresh.started_at <= refresh.finished_at
+    assert refresh.duration >= 0
+    assert (
+        SimpleMaterializedViewWithoutDependencies.last_refreshed()
+        == refresh.finished_at
+    )
+
+    # fresh enough
+    assert not SimpleMaterializedViewWithoutDependencies.refresh_if_stale(max_age=3600)
+    assert MaterializedViewRefresh.objects.count() == 1
+    settings.DB_VIEWS_REFRESH_LOG_ROW_COUNT = True
+    assert SimpleMaterializedViewWithoutDependencies.refresh_if_stale(max_age=0)
+    assert MaterializedViewRefresh.objects.count() == 2
+    assert MaterializedViewRefresh.objects.latest("finished_at").row_count == 1
+
+    # without the log table view is considered never refreshed.
+    log_table = MaterializedViewRefresh._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("ALTER TABLE %s RENAME TO missing_refresh_log" % log_table)
+    try:
+        with transaction.atomic():
+            with pytest.warns(UserWarning, match="migrations applied"):
+                assert SimpleMaterializedViewWithoutDependencies.is_stale(
+                    timedelta(hours=1)
+                )
+            with pytest.warns(UserWarning, match="migrations applied"):
+                assert SimpleMaterializedViewWithoutDependencies.refresh_if_stale(
+                    max_age=3600
+                )
+            # transaction is still usable
+            assert SimpleMaterializedViewWithoutDependencies.objects.count() == 1
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE missing_refresh_log RENAME TO %s" % log_table)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_refreshviews_command(
+    temp_migrations_dir,
+    SimpleMaterializedViewWithoutDependencies,
+    DependentMaterializedView,
+):
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+
+    out = StringIO()
+    call_command("refreshviews", "test_app", dry_run=True, stdout=out)
+    assert out.getvalue() == (
+        "Batch 1:\n"
+        "  test_app.SimpleMaterializedViewWithoutDependencies\n"
+        "Batch 2:\n"
+        "  test_app.DependentMaterializedView\n"
+    )
+    assert not MaterializedViewRefresh.objects.exists()
+
+    out = StringIO()
+    call_command("refreshviews", parallel=2, timeout=60, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith(
+        "  test_app.SimpleMaterializedViewWithoutDependencies OK"
+    )
+    assert lines[1].startswith("  test_app.DependentMaterializedView OK")
+    assert lines[2].startswith("Refreshed 2 of 2 view(s) in ")
+    assert MaterializedViewRefresh.objects.count() == 2
+
+    out = StringIO()
+    call_command("refreshviews", "test_app.DependentMaterializedView", stdout=out)
+    assert "Refreshed 1 of 1 view(s)" in out.getvalue()
+    with pytest.raises(CommandError):
+        call_command("refreshviews", "test_app.Unknown")
+
+
+def test_refreshviews_command_skips_views_of_other_engines(
+    SimpleMaterializedViewWithoutDependencies, QuestionTotal
+):
+    out = StringIO()
+    call_command("refreshviews", dry_run=True, stdout=out)
+    assert out.getvalue() == (
+        "Batch 1:\n  test_app.SimpleMaterializedViewWithoutDependencies\n"
+    )
+    with pytest.raises(CommandError, match="defined for database 'default'"):
+        call_command("refreshviews", "test_app.QuestionTotal", dry_run=True)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_refresh_and_view_ddl_signals(
+    temp_migrations_dir, settings, SimpleMaterializedViewWithoutDependencies
+):
+    table_name = SimpleMaterializedViewWithoutDependencies._meta.db_table
+    metrics = []
+    settings.DB_VIEWS_METRICS_CALLBACK = lambda name, duration, tags: metrics.append(
+        (name, tags)
+    )
+    received = []
+
+    def receiver(signal, **kwargs):
+        received.append((signal, kwargs))
+
+    for signal in (pre_refresh, post_refresh, pre_view_ddl, post_view_ddl):
+        signal.connect(receiver)
+    try:
+        call_command("makeviewmigrations", "test_app")
+        call_command("migrate", "test_app")
+        ddl = [kwargs for signal, kwargs in received if signal is post_view_ddl]
+        assert len(ddl) == 2
+        assert ddl[0]["sql"] == 'DROP MATERIALIZED VIEW IF EXISTS "%s";' % table_name
+        assert ddl[1]["sql"].startswith('CREATE MATERIALIZED VIEW "%s"' % table_name)
+        assert all(kwargs["table_name"] == table_name for kwargs in ddl)
+        assert all(kwargs["duration"] >= 0 for kwargs in ddl)
+        assert all(kwargs["exception"] is None for kwargs in ddl)
+        assert ddl[0]["engine"] == "django.db.backends.postgresql"
+
+        received.clear()
+        metrics.clear()
+        SimpleMaterializedViewWithoutDependencies.refresh()
+        assert [signal for signal, kwargs in received] == [pre_refresh, post_refresh]
+        kwargs = received[1][1]
+        assert kwargs["sender"] is SimpleMaterializedViewWithoutDependencies
+        assert kwargs["using"] == "default"
+        assert kwargs["strategy"] == "refresh"
+        assert kwargs["sql"] == 'REFRESH MATERIALIZED VIEW "%s";' % table_name
+        assert kwargs["duration"] >= 0
+        assert metrics == [
+            (
+                "db_views.refresh",
+                {
+                    "view": table_name,
+                    "using": "default",
+                    "engine": "django.db.backends.postgresql",
+                    "strategy": "refresh",
+                    "success": True,
+                },
+            )
+        ]
+    finally:
+        for signal in (pre_refresh, post_refresh, pre_view_ddl, post_view_ddl):
+            signal.disconnect(receiver)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_deployed_materialized_view_is_not_recreated(
+    temp_migrations_dir, settings, SimpleMaterializedViewWithoutDependencies
+):
+    table_name = SimpleMaterializedViewWithoutDependencies._meta.db_table
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    assert table_name in get_fingerprints(connection)
+    current_date_time = (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+    )
+
+    # same definition is already deployed, view is not populated again.
+    call_command("migrate", "test_app", "zero", fake=True)
+    call_command("migrate", "test_app")
+    assert (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+        == current_date_time
+    )
+
+    settings.DB_VIEWS_FINGERPRINTS = False
+    call_command("migrate", "test_app", "zero", fake=True)
+    call_command("migrate", "test_app")
+    assert (
+        SimpleMaterializedViewWithoutDependencies.objects.get().current_date_time
+        != current_date_time
+    )
+    settings.DB_VIEWS_FINGERPRINTS = True
+    call_command("migrate", "test_app", "zero")
+    assert table_name not in get_fingerprints(connection)
+    assert not is_view_exists(table_name)
+
+    # reading fingerprints does not create the table.
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE %s" % FINGERPRINT_TABLE)
+    forget_fingerprint_table(connection)
+    assert get_fingerprints(connection) == {}
+    with connection.cursor() as cursor:
+        assert FINGERPRINT_TABLE not in connection.introspection.table_names(cursor)
+
+
+def get_fingerprint_statements(queries) -> list:
+    return [
+        query["sql"].split(" ")[0]
+        for query in queries
+        if FINGERPRINT_TABLE in query["sql"]
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_view_migration_fingerprint_statements():
+    engine = "django.db.backends.postgresql"
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS %s" % FINGERPRINT_TABLE)
+    forget_fingerprint_table(connection)
+    try:
+        with CaptureQueriesContext(connection) as context:
+            with connection.schema_editor() as schema_editor:
+                ForwardViewMigration("SELECT 1 AS id", "first_view", engine=engine)(
+                    None, schema_editor
+                )
+        # table is created once, nothing is removed from the new table.
+        assert get_fingerprint_statements(context.captured_queries) == [
+            "SELECT",
+            "SELECT",
+            "CREATE",
+            "INSERT",
+        ]
+        with CaptureQueriesContext(connection) as context:
+            with connection.schema_editor() as schema_editor:
+                ForwardViewMigration("SELECT 1 AS id", "second_view", engine=engine)(
+                    None, schema_editor
+                )
+        # existing table is remembered by the connection.
+        assert get_fingerprint_statements(context.captured_queries) == [
+            "SELECT",
+            "DELETE",
+            "INSERT",
+        ]
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("DROP VIEW IF EXISTS first_view")
+            cursor.execute("DROP VIEW IF EXISTS second_view")
+            cursor.execute("DELETE FROM %s" % FINGERPRINT_TABLE)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_refresh_lock(temp_migrations_dir, SimpleMaterializedViewWithoutDependencies):
+    View = SimpleMaterializedViewWithoutDependencies
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+    lock_key = get_refresh_lock_key(View._meta.db_table)
+    # refresh running at other node.
+    other_connection = connections.create_connection("default")
+    try:
+        with other_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [lock_key])
+        assert View.refresh(lock="skip") is False
+        assert not MaterializedViewRefresh.objects.exists()
+        with pytest.raises(DatabaseError, match="lock timeout"):
+            View.refresh(lock="wait", lock_timeout=0.1)
+        assert View.refresh_if_stale(max_age=0, lock="skip") is False
+        results = refresh_all([View], lock="skip")
+        assert [(result.busy, result.duration) for result in results] == [(True, None)]
+
+        out = StringIO()
+        call_command(
+            "refreshviews",
+            "test_app.SimpleMaterializedViewWithoutDependencies",
+            lock="skip",
+            stdout=out,
+        )
+        assert "BUSY" in out.getvalue()
+        assert "1 busy" in out.getvalue()
+    finally:
+        with other_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_key])
+        other_connection.close()
+
+    assert View.refresh(lock="skip") is True
+    assert View.refresh_if_stale(max_age=0, lock="wait") is True
+    assert MaterializedViewRefresh.objects.count() == 2
+    # lock is released
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_key])
+        assert cursor.fetchone()[0] is True
+        cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_key])
+
+
+@pytest.mark.django_db(databases=["default", "sqlite"], transaction=True)
+def test_table_backed_materialized_view(temp_migrations_dir, Question, QuestionTotal):
+    call_command("makemigrations", "test_app")
+    call_command("makeviewmigrations", "test_app")
+    try:
+        call_command("migrate", "test_app", database="sqlite")
+        sqlite = connections["sqlite"]
+        with sqlite.cursor() as cursor:
+            tables = sqlite.introspection.get_table_list(cursor)
+        assert ("question_total", "t") in [(table.name, table.type) for table in tables]
+        assert QuestionTotal.objects.using("sqlite").get().total == 0
+
+        Question.objects.using("sqlite").create(text="question_1")
+        Question.objects.using("sqlite").create(text="question_2")
+        assert QuestionTotal.objects.using("sqlite").get().total == 0
+        assert QuestionTotal.refresh(using="sqlite") is True
+        assert QuestionTotal.objects.using("sqlite").get().total == 2
+        assert QuestionTotal.refresh(using="sqlite", strategy="swap") is True
+        with sqlite.cursor() as cursor:
+            constraints = sqlite.introspection.get_constraints(cursor, "question_total")
+            tables = sqlite.introspection.table_names(cursor)
+        assert "question_total_idx" in constraints
+        assert not {"question_total_shadow", "question_total_old"} & set(tables)
+        with pytest.raises(NotSupportedError):
+            QuestionTotal.refresh(using="sqlite", concurrently=True)
+        assert MaterializedViewRefresh.objects.using("sqlite").count() == 2
+
+        [drift] = check_views_drift([QuestionTotal], using="sqlite")
+        assert drift.status == OK
+
+        # changed definition is deployed by migrate, not by refresh.
+        QuestionTotal.view_definition = {
+            "django.db.backends.sqlite3": "SELECT 1 AS id, 0 AS total"
+        }
+        with pytest.raises(ValueError, match="run migrate"):
+            QuestionTotal.refresh(using="sqlite")
+        assert QuestionTotal.objects.using("sqlite").get().total == 2
+    finally:
+        call_command("migrate", "test_app", "zero", database="sqlite")
+    with sqlite.cursor() as cursor:
+        assert "question_total" not in sqlite.introspection.table_names(cursor)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_materialized_view_created_with_no_data(temp_migrations_dir, NotPopulatedView):
+    View = NotPopulatedView
+    call_command("makeviewmigrations", "test_app")
+    assert "with_data=False" in (temp_migrations_dir / "0001_initial.py").read()
+    call_command("migrate", "test_app")
+    assert View.is_populated() is False
+    assert get_unpopulated_views([View]) == [View]
+    with pytest.raises(DatabaseError, match="has not been populated"):
+        with transaction.atomic():
+            list(View.objects.all())
+
+    out = StringIO()
+    call_command(
+        "refreshviews", "test_app.NotPopulatedView", "--unpopulated", stdout=out
+    )
+    assert "Refreshed 1 of 1" in out.getvalue()
+    assert View.is_populated() is True
+    assert View.objects.get().id == 1
+    out = StringIO()
+    call_command(
+        "refreshviews", "test_app.NotPopulatedView", "--unpopulated", stdout=out
+    )
+    assert "No materialized views to refresh." in out.getvalue()
+
+    # concurrently needs a populated view, first refresh falls back to the regular one.
+    call_command("migrate", "test_app", "zero")
+    call_command("migrate", "test_app")
+    assert View.is_populated() is False
+    assert View.refresh(concurrently=True) is True
+    assert View.is_populated() is True
+    assert View.refresh(concurrently=True) is True
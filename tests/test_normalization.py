@@ -0,0 +1,55 @@
+import json
+
+from django_db_views.normalization import SQLNormalizationCache, sql_normalize
+
+
+def test_normalization_cache_normalize_each_sql_once(mocker):
+    cache = SQLNormalizationCache()
+    normalize = mocker.patch(
+        "django_db_views.normalization.sql_normalize", side_effect=sql_normalize
+    )
+
+    assert cache.normalize("select * from xyz") == "SELECT *\nFROM xyz"
+    assert cache.normalize("select * from xyz") == "SELECT *\nFROM xyz"
+    assert normalize.call_count == 1
+
+
+def test_normalization_cache_evicts_least_recently_used_entries():
+    cache = SQLNormalizationCache(max_entries=2)
+    cache.normalize("select 1")
+    cache.normalize("select 2")
+    cache.normalize("select 1")
+    cache.normalize("select 3")
+
+    assert list(cache.entries.keys()) == [
+        cache.get_key("select 1"),
+        cache.get_key("select 3"),
+    ]
+
+
+def test_normalization_cache_is_persisted_between_runs(tmpdir, mocker):
+    path = str(tmpdir / "cache" / "sql_normalization.json")
+    cache = SQLNormalizationCache(path=path)
+    cache.normalize("select * from xyz")
+    cache.save()
+
+    normalize = mocker.patch("django_db_views.normalization.sql_normalize")
+    cache = SQLNormalizationCache(path=path)
+    assert cache.normalize("select * from xyz") == "SELECT *\nFROM xyz"
+    assert not normalize.called
+
+
+def test_normalization_cache_drops_entries_of_other_sqlparse_version(tmpdir):
+    path = tmpdir / "sql_normalization.json"
+    path.write_text(
+        json.dumps(
+            {
+                "sqlparse": "0.0.0",
+                "entries": {SQLNormalizationCache.get_key("select 1"): "stale"},
+            }
+        ),
+        encoding="utf-8",
+    )
+    cache = SQLNormalizationCache(path=str(path))
+
+    assert cache.normalize("select 1") == "SELECT 1"
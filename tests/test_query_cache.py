@@ -0,0 +1,64 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from django_db_views.query_cache import (
+    CachedViewQuerySet,
+    get_queryset_cache,
+    get_versioned_views,
+)
+from tests.decorators import roll_back_schema
+from tests.fixturies import dynamic_models_cleanup  # noqa
+
+
+def count_queries(function):
+    with CaptureQueriesContext(connection) as context:
+        result = function()
+    return result, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_cached_queryset_is_invalidated_by_refresh(
+    temp_migrations_dir, SimpleMaterializedViewWithoutDependencies
+):
+    View = SimpleMaterializedViewWithoutDependencies
+    get_queryset_cache().clear()
+    call_command("makeviewmigrations", "test_app")
+    call_command("migrate", "test_app")
+
+    rows, queries = count_queries(lambda: list(CachedViewQuerySet(View)))
+    assert queries == 1
+    cached_rows, queries = count_queries(lambda: list(CachedViewQuerySet(View)))
+    assert queries == 0
+    assert cached_rows == rows
+    assert count_queries(lambda: CachedViewQuerySet(View).count()) == (1, 1)
+    assert count_queries(lambda: CachedViewQuerySet(View).count()) == (1, 0)
+    aggregate = lambda: CachedViewQuerySet(View).aggregate(total=Count("pk"))  # noqa
+    assert count_queries(aggregate) == ({"total": 1}, 1)
+    assert count_queries(aggregate) == ({"total": 1}, 0)
+    # other query is cached separately.
+    assert count_queries(lambda: list(CachedViewQuerySet(View).values()))[1] == 1
+    assert count_queries(lambda: list(CachedViewQuerySet(View).uncached()))[1] == 1
+
+    View.refresh()
+    refreshed_rows, queries = count_queries(lambda: list(CachedViewQuerySet(View)))
+    assert queries == 1
+    assert refreshed_rows[0].current_date_time > rows[0].current_date_time
+    assert count_queries(lambda: list(CachedViewQuerySet(View)))[1] == 0
+
+
+def test_versioned_views(
+    SimpleMaterializedViewWithoutDependencies, ViewOnMaterializedView
+):
+    engine = connection.settings_dict["ENGINE"]
+    assert get_versioned_views(SimpleMaterializedViewWithoutDependencies, engine) == [
+        SimpleMaterializedViewWithoutDependencies
+    ]
+    # refresh of the materialized view changes results of the view.
+    assert get_versioned_views(ViewOnMaterializedView, engine) == [
+        SimpleMaterializedViewWithoutDependencies,
+        ViewOnMaterializedView,
+    ]
@@ -0,0 +1,199 @@
+from io import StringIO
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection, models
+from django.db.migrations import RunSQL, AlterField, CreateModel
+
+from django_db_views.db_view import DBViewsRegistry
+from django_db_views.migration_functions import (
+    ForwardViewMigration,
+    BackwardViewMigration,
+    ForwardMaterializedViewMigration,
+    BackwardMaterializedViewMigration,
+    ViewIndexesMigration,
+)
+from django_db_views.operations import ViewRunPython, ViewIndexRunPython
+from django_db_views.squash import squash_view_operations
+from tests.asserts_utils import is_view_exists
+from tests.decorators import roll_back_schema
+
+
+def make_view_migrations_history(SimpleViewWithoutDependencies):
+    """0001 creates views, 0002 models, 0003 and 0005 update the view, 0004 drops the second view."""
+    call_command("makeviewmigrations", "test_app")
+    call_command("makemigrations", "test_app", name="create_models")
+    SimpleViewWithoutDependencies.view_definition = """
+        Select * From (values (3, 'dummy_3')) A(id, name)
+    """
+    call_command("makeviewmigrations", "test_app", name="update_view")
+    del apps.all_models["test_app"]["secondsimpleviewwithoutdependencies"]
+    apps.clear_cache()
+    DBViewsRegistry.pop("test_app_secondsimpleviewwithoutdependencies")
+    call_command("makeviewmigrations", "test_app", name="delete_view")
+    SimpleViewWithoutDependencies.view_definition = """
+        Select * From (values (4, 'dummy_4'), (5, 'dummy_5')) A(id, name)
+    """
+    call_command("makeviewmigrations", "test_app", name="update_view_again")
+
+
+def get_names(table_name: str) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM %s ORDER BY name" % table_name)
+        return [name for (name,) in cursor.fetchall()]
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_squash_view_migrations(
+    temp_migrations_dir,
+    SimpleViewWithoutDependencies,
+    SecondSimpleViewWithoutDependencies,
+    SimpleMaterializedViewWithIndex,
+):
+    make_view_migrations_history(SimpleViewWithoutDependencies)
+    assert len(temp_migrations_dir.listdir()) == 6
+
+    out = StringIO()
+    call_command(
+        "squashviewmigrations", "test_app", "0005", interactive=False, stdout=out
+    )
+    squashed = (temp_migrations_dir / "0001_squashed_0005_update_view_again.py").read()
+    assert "replaces" in squashed
+    # one operation per view with the latest definition, dropped view disappears.
+    assert squashed.count("ViewRunPython(") == 2
+    assert "ViewDropRunPython" not in squashed
+    assert "dummy_4" in squashed
+    assert "dummy_3" not in squashed
+    assert "simple_mv_current_date_time_uniq" in squashed
+    assert "CreateModel" in squashed
+
+    # squashed migration is used by autodetector and migrate.
+    out = StringIO()
+    call_command("makeviewmigrations", "test_app", stdout=out)
+    assert "No changes detected" in out.getvalue()
+    call_command("migrate", "test_app")
+    table_name = SimpleViewWithoutDependencies._meta.db_table
+    assert get_names(table_name) == ["dummy_4", "dummy_5"]
+    assert not is_view_exists("test_app_secondsimpleviewwithoutdependencies")
+    assert is_view_exists(SimpleMaterializedViewWithIndex._meta.db_table)
+    call_command("migrate", "test_app", "zero")
+    assert not is_view_exists(table_name)
+
+
+@pytest.mark.django_db(transaction=True)
+@roll_back_schema
+def test_squash_view_migrations_from_start_migration(
+    temp_migrations_dir,
+    SimpleViewWithoutDependencies,
+    SecondSimpleViewWithoutDependencies,
+):
+    make_view_migrations_history(SimpleViewWithoutDependencies)
+    call_command(
+        "squashviewmigrations",
+        "test_app",
+        "0003",
+        "0005",
+        interactive=False,
+        stdout=StringIO(),
+    )
+    squashed = (
+        temp_migrations_dir / "0003_update_view_squashed_0005_update_view_again.py"
+    ).read()
+    # second view existed before squashed migrations, so it is dropped.
+    assert "ViewDropRunPython" in squashed
+    assert squashed.count("ViewRunPython(") == 1
+
+    table_name = SimpleViewWithoutDependencies._meta.db_table
+    call_command("migrate", "test_app")
+    assert get_names(table_name) == ["dummy_4", "dummy_5"]
+    assert not is_view_exists("test_app_secondsimpleviewwithoutdependencies")
+    # backward operations restore views of 0002.
+    call_command("migrate", "test_app", "0002")
+    assert get_names(table_name) == ["dummy_1", "dummy_2"]
+    assert is_view_exists("test_app_secondsimpleviewwithoutdependencies")
+
+
+def test_squash_view_operations_merges_index_changes():
+    engine = "django.db.backends.postgresql"
+    index_sql = "CREATE INDEX idx ON mv (id)"
+    operations = [
+        ViewRunPython(
+            ForwardMaterializedViewMigration("select 1 as id", "mv", engine=engine),
+            BackwardMaterializedViewMigration("", "mv", engine=engine),
+            atomic=False,
+        ),
+        ViewIndexRunPython(
+            ViewIndexesMigration("mv", add_indexes={"idx": index_sql}, engine=engine),
+            ViewIndexesMigration("mv", remove_indexes=["idx"], engine=engine),
+            atomic=False,
+        ),
+    ]
+    [operation] = squash_view_operations(operations)
+    assert isinstance(operation, ViewRunPython)
+    assert operation.code.view_definition == "select 1 as id"
+    assert operation.code.indexes == {"idx": index_sql}
+    assert operation.reverse_code.view_definition == ""
+    # nothing changed compared to previous operations.
+    assert squash_view_operations(operations[1:], previous_operations=operations) == []
+
+
+def test_squash_view_operations_keeps_views_of_run_sql():
+    engine = "django.db.backends.postgresql"
+
+    def get_view_operation(view_definition, previous_view_definition):
+        return ViewRunPython(
+            ForwardViewMigration(view_definition, "view", engine=engine),
+            BackwardViewMigration(previous_view_definition, "view", engine=engine),
+            atomic=False,
+        )
+
+    run_sql = RunSQL("INSERT INTO report SELECT * FROM view", RunSQL.noop)
+    operations = [
+        get_view_operation("select 1 as id", ""),
+        get_view_operation("select 2 as id", "select 1 as id"),
+        run_sql,
+        get_view_operation("select 3 as id", "select 2 as id"),
+        get_view_operation("select 4 as id", "select 3 as id"),
+    ]
+    first, second, third = squash_view_operations(operations)
+    # RunSQL reads the view as it was defined before it.
+    assert first.code.view_definition == "select 2 as id"
+    assert first.reverse_code.view_definition == ""
+    assert second is run_sql
+    assert third.code.view_definition == "select 4 as id"
+    assert third.reverse_code.view_definition == "select 2 as id"
+
+
+def test_squash_view_operations_replaces_existing_views_before_schema_changes():
+    engine = "django.db.backends.postgresql"
+
+    def get_view_operation(table_name, view_definition, previous_view_definition):
+        return ViewRunPython(
+            ForwardViewMigration(view_definition, table_name, engine=engine),
+            BackwardViewMigration(previous_view_definition, table_name, engine=engine),
+            atomic=False,
+        )
+
+    # squashed from a start migration, view existed before.
+    previous_operations = [
+        get_view_operation("v", "select id, col from t", ""),
+    ]
+    alter_field = AlterField("t", "col", models.BigIntegerField())
+    create_model = CreateModel("t2", [("id", models.AutoField(primary_key=True))])
+    operations = [
+        get_view_operation("v", "select id from t", "select id, col from t"),
+        alter_field,
+        create_model,
+        get_view_operation("w", "select id from t2", ""),
+    ]
+    replace, second, third, create = squash_view_operations(
+        operations, previous_operations
+    )
+    # view stops reading the column before the column is altered.
+    assert replace.code.view_definition == "select id from t"
+    assert replace.reverse_code.view_definition == "select id, col from t"
+    assert (second, third) == (alter_field, create_model)
+    # new view follows tables it reads.
+    assert create.code.table_name == "w"
@@ -0,0 +1,51 @@
+from django.conf import settings
+
+from django_db_views.view_definitions import (
+    get_view_definition_from_model,
+    clear_view_definitions_cache,
+)
+
+
+def test_callable_view_definition_is_evaluated_once(mocker):
+    view_definition = mocker.Mock(return_value=" SELECT 1 ")
+
+    class View:
+        pass
+
+    View.view_definition = view_definition
+    engine = settings.DATABASES["default"]["ENGINE"]
+
+    assert get_view_definition_from_model(View) == {engine: "SELECT 1"}
+    assert get_view_definition_from_model(View, engine=engine) == {engine: "SELECT 1"}
+    assert get_view_definition_from_model(View, engine="other") == {}
+    assert view_definition.call_count == 1
+
+    clear_view_definitions_cache(View)
+    get_view_definition_from_model(View)
+    assert view_definition.call_count == 2
+
+    # new definition invalidates cache.
+    View.view_definition = "SELECT 2"
+    assert get_view_definition_from_model(View) == {engine: "SELECT 2"}
+
+
+def test_only_needed_engine_definition_is_evaluated(mocker):
+    postgres_definition = mocker.Mock(return_value="SELECT 1")
+    sqlite_definition = mocker.Mock(return_value="SELECT 2")
+
+    class View:
+        view_definition = {
+            "django.db.backends.postgresql": postgres_definition,
+            "django.db.backends.sqlite3": sqlite_definition,
+        }
+
+    assert get_view_definition_from_model(
+        View, engine="django.db.backends.postgresql"
+    ) == {"django.db.backends.postgresql": "SELECT 1"}
+    assert not sqlite_definition.called
+    assert get_view_definition_from_model(View) == {
+        "django.db.backends.postgresql": "SELECT 1",
+        "django.db.backends.sqlite3": "SELECT 2",
+    }
+    assert postgres_definition.call_count == 1
+    assert sqlite_definition.call_count == 1